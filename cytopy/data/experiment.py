@@ -40,6 +40,7 @@ from .errors import *
 from typing import List
 from collections import Counter
 from datetime import datetime
+from mongoengine.context_managers import no_dereference
 from warnings import warn
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -291,7 +292,7 @@ def check_pairing(channel_marker: dict,
         True if pairing exists, else False
     """
     channel, marker = _is_empty(channel_marker.get("channel")), _is_empty(channel_marker.get("marker"))
-    if not any([n.check_matched_pair(channel=channel, marker=marker) for n in ref_mappings]):
+    if not any(n.check_matched_pair(channel=channel, marker=marker) for n in ref_mappings):
         return False
     return True
 
@@ -708,7 +709,9 @@ class Experiment(mongoengine.Document):
     def filter_samples_by_subject(self,
                                   query: str or mongoengine.queryset.visitor.Q) -> list:
         """
-        Filter FileGroups associated to this experiment based on some subject meta-data
+        Filter FileGroups associated to this experiment based on some subject meta-data.
+        Subject references are read without dereferencing them and all subjects are
+        queried at once, rather than fetching each FileGroup's subject in turn.
 
         Parameters
         ----------
@@ -719,16 +722,14 @@ class Experiment(mongoengine.Document):
         -------
         List
         """
-        matches = list()
-        for f in self.fcs_files:
-            try:
-                Subject.objects(id=f.subject.id).filter(query).get()
-                matches.append(f.primary_id)
-            except mongoengine.DoesNotExist:
-                continue
-            except mongoengine.MultipleObjectsReturned:
-                matches.append(f.primary_id)
-        return matches
+        with no_dereference(FileGroup):
+            # Raw reference is an ObjectId, DBRef or an already dereferenced Subject
+            subject_ids = {f.primary_id: getattr(f.subject, "id", f.subject)
+                           for f in self.fcs_files if f.subject is not None}
+        matching_subjects = set(s.id for s in Subject.objects(id__in=list(set(subject_ids.values())))
+                                .filter(query)
+                                .only("id"))
+        return [sample_id for sample_id, subject_id in subject_ids.items() if subject_id in matching_subjects]
 
     def list_samples(self,
                      valid_only: bool = True) -> list:
@@ -1087,7 +1088,7 @@ class Experiment(mongoengine.Document):
         """
         for new_population_name, targets in mergers.items():
             for f in self.fcs_files:
-                pops = [p for p in targets if p in f.list_populations()]
+                pops = [p for p in targets if p in f.tree]
                 try:
                     f.merge_non_geom_populations(populations=pops, new_population_name=new_population_name)
                     f.save()
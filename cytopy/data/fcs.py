@@ -31,7 +31,7 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from ..feedback import vprint
 from ..flow.tree import construct_tree
 from ..flow.transform import apply_transform, apply_transform_map
-from ..flow.sampling import uniform_downsampling
+from ..flow.sampling import uniform_sample_index
 from ..flow.build_models import build_sklearn_model
 from .geometry import create_convex_hull
 from .population import Population, merge_gate_populations, merge_non_geom_populations, PolygonGeom
@@ -39,6 +39,7 @@ from .subject import Subject
 from .errors import *
 from sklearn.model_selection import StratifiedKFold, permutation_test_score
 from imblearn.over_sampling import RandomOverSampler
+from functools import partial
 from warnings import warn
 from typing import List, Generator
 import pandas as pd
@@ -58,6 +59,25 @@ __maintainer__ = "Ross Burton"
 __email__ = "burtonrj@cardiff.ac.uk"
 __status__ = "Production"
 
+# Raw data chunk cache (bytes) used when reading a FileGroup HDF5 file; large enough to hold
+# the chunks of many population indexes at once (the HDF5 default is 1 MB)
+HDF5_CHUNK_CACHE_BYTES = 64 * 1024 ** 2
+# Number of hash slots in the chunk cache; a prime roughly 10x the 256 index chunks
+# (HDF5_CHUNK_CACHE_BYTES / INDEX_CHUNK_BYTES) the cache can hold, to keep hash collisions rare
+HDF5_CHUNK_CACHE_SLOTS = 2557
+# Chunk preemption policy; fully read chunks are evicted first
+HDF5_CHUNK_CACHE_W0 = 0.75
+# Keyword arguments used whenever a FileGroup HDF5 file is opened for reading
+HDF5_READ_KWARGS = {"rdcc_nbytes": HDF5_CHUNK_CACHE_BYTES,
+                    "rdcc_nslots": HDF5_CHUNK_CACHE_SLOTS,
+                    "rdcc_w0": HDF5_CHUNK_CACHE_W0}
+# Target size (bytes) of a chunk of a population index dataset (65536 int32 events); small
+# enough that many chunks stay resident in the chunk cache, while keeping per-chunk overhead low
+INDEX_CHUNK_BYTES = 256 * 1024
+# Population indexes with fewer events than this are stored contiguously without filters;
+# for small datasets the chunk B-tree and filter pipeline cost more than compression saves
+MIN_COMPRESSED_INDEX_SIZE = 4096
+
 
 def data_loaded(func: callable) -> callable:
     """
@@ -111,7 +131,8 @@ def h5_read_population_primary_index(population_name: str,
                                      h5file: h5py.File):
     """
     Given a population and an instance of a H5 file object, return the
-    index of corresponding events
+    index of corresponding events. The dataset is read directly into a
+    preallocated array of the stored dtype.
 
     Parameters
     ----------
@@ -122,7 +143,85 @@ def h5_read_population_primary_index(population_name: str,
     -------
     numpy.ndarray
     """
-    return h5file[f"/index/{population_name}/primary"][:]
+    return _read_index_dataset(h5file[f"/index/{population_name}/primary"])
+
+
+def h5_read_population_primary_indexes(population_names: List[str],
+                                       h5file: h5py.File) -> dict:
+    """
+    Given a list of populations and an instance of a H5 file object, return the
+    index of corresponding events for each population. The names of the populations
+    stored in the file are fetched once, rather than probing the file for each
+    population in turn.
+
+    Parameters
+    ----------
+    population_names: list
+    h5file: h5py.File
+
+    Returns
+    -------
+    dict
+        {population name: numpy.ndarray}; populations not stored in the file are omitted
+    """
+    index_group = h5file["index"]
+    stored = set(index_group.keys())
+    return {name: _read_index_dataset(index_group[f"{name}/primary"])
+            for name in population_names if name in stored}
+
+
+def _read_index_dataset(dataset: h5py.Dataset) -> np.ndarray:
+    """
+    Read an index dataset directly into a preallocated array of the stored dtype. Delta
+    encoded indexes (see encode_index) are decoded with a cumulative sum.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    index = np.empty(dataset.shape, dtype=dataset.dtype)
+    if dataset.size > 0:
+        dataset.read_direct(index)
+    if dataset.attrs.get("encoding") == "delta":
+        index = np.cumsum(index, dtype=np.dtype(dataset.attrs["index_dtype"]))
+        index += dataset.attrs["start"]
+    return index
+
+
+def h5_read_event_rows(dataset: h5py.Dataset,
+                       rows: np.ndarray or None = None) -> np.ndarray:
+    """
+    Read the given rows of a 2-D event matrix (e.g. the primary data of a FileGroup).
+    Event matrices are stored contiguously and without filters, so the dataset is
+    memory-mapped and only the pages holding the requested rows are read from disk;
+    the full matrix is never materialised. Datasets that are chunked or filtered
+    cannot be mapped and are read in full before the rows are selected.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+    rows: Numpy Array, optional
+        Row positions to read; if not given, the whole matrix is returned
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    if rows is None:
+        return dataset[:]
+    offset = dataset.id.get_offset()
+    if dataset.chunks is None and offset is not None:
+        events = np.memmap(dataset.file.filename,
+                           dtype=dataset.dtype,
+                           mode="r",
+                           offset=offset,
+                           shape=dataset.shape)
+        return events[rows].view(np.ndarray)
+    return dataset[:][rows]
 
 
 def set_column_names(df: pd.DataFrame,
@@ -210,11 +309,17 @@ class FileGroup(mongoengine.Document):
         super().__init__(*args, **kwargs)
         self._columns_default = "markers"
         self.cell_meta_labels = {}
+        # Names of populations with an index stored in the HDF5 file
+        self._stored_indexes = set()
+        # Position of each population in self.populations, by name (see _population_position)
+        self._population_positions = {}
+        # Rendered population tree (see print_population_tree); reset whenever the tree changes
+        self._tree_render = None
         if self.id:
             self.h5path = os.path.join(self.data_directory, f"{self.id.__str__()}.hdf5")
             self.tree = construct_tree(populations=self.populations)
-            self._load_cell_meta_labels()
-            self._load_population_indexes()
+            self._tree_render = None
+            self._load_from_disk()
         else:
             if any([x is None for x in [data, channels, markers]]):
                 raise ValueError("New instance of FileGroup requires that data, channels, and markers "
@@ -255,18 +360,49 @@ class FileGroup(mongoengine.Document):
         AssertionError
             Invalid source
         """
-        with h5py.File(self.h5path, "r") as f:
+        return self._read_events(source=source, sample_size=sample_size)
+
+    def _read_events(self,
+                     source: str,
+                     rows: np.ndarray or None = None,
+                     sample_size: int or float or None = None) -> pd.DataFrame:
+        """
+        Load the events of the desired source file as a DataFrame, optionally restricted
+        to the given rows (see h5_read_event_rows). The DataFrame index is the row
+        position of each event in the source file.
+
+        Parameters
+        ----------
+        source: str
+            Name of the file to load from e.g. either "primary" or the name of a control
+        rows: Numpy Array, optional
+            Row positions of the events to load; if not given, all events are loaded
+        sample_size: int or float (optional)
+            Uniformly sample this many rows (or this proportion of rows) before reading,
+            so that only the sampled events are read from disk; ignored if rows is given
+
+        Returns
+        -------
+        Pandas.DataFrame
+
+        Raises
+        ------
+        AssertionError
+            Invalid source
+        """
+        with h5py.File(self.h5path, "r", **HDF5_READ_KWARGS) as f:
             assert source in f.keys(), f"Invalid source, expected one of: {f.keys()}"
             channels = [x.decode("utf-8") for x in f[f"mappings/{source}/channels"][:]]
             markers = [x.decode("utf-8") for x in f[f"mappings/{source}/markers"][:]]
-            data = set_column_names(df=pd.DataFrame(f[source][:], dtype=np.float32),
-                                    channels=channels,
-                                    markers=markers,
-                                    preference=self.columns_default)
-        if sample_size is not None:
-            return uniform_downsampling(data=data,
-                                        sample_size=sample_size)
-        return data
+            if rows is None and sample_size is not None:
+                rows = uniform_sample_index(n=f[source].shape[0], sample_size=sample_size)
+            data = pd.DataFrame(h5_read_event_rows(dataset=f[source], rows=rows),
+                                index=rows,
+                                dtype=np.float32)
+        return set_column_names(df=data,
+                                channels=channels,
+                                markers=markers,
+                                preference=self.columns_default)
 
     def init_new_file(self,
                       data: np.array,
@@ -303,6 +439,7 @@ class FileGroup(mongoengine.Document):
                                        n=data.shape[0],
                                        source="root")]
         self.tree = {"root": anytree.Node(name="root", parent=None)}
+        self._tree_render = None
         self.save()
 
     def add_ctrl_file(self,
@@ -343,36 +480,125 @@ class FileGroup(mongoengine.Document):
         self.save()
 
     @data_loaded
-    def _load_cell_meta_labels(self):
+    def _load_from_disk(self):
         """
-        Load single cell meta labels from disk
+        Load single cell meta labels from disk. Population level event index data is
+        not read here; each population reads its index on first access (see
+        _load_population_indexes). The names of the stored population indexes are
+        cached, so that later reads need not probe the file for them.
 
         Returns
         -------
         None
         """
-        with h5py.File(self.h5path, "r") as f:
-            if "cell_meta_labels" in f.keys():
-                for meta in f["cell_meta_labels"].keys():
-                    self.cell_meta_labels[meta] = np.array(f[f"cell_meta_labels/{meta}"][:],
-                                                           dtype="U")
+        with h5py.File(self.h5path, "r", **HDF5_READ_KWARGS) as f:
+            self._load_cell_meta_labels(h5file=f)
+            if "index" in f.keys():
+                self._stored_indexes = set(f["index"].keys())
+        self._load_population_indexes()
 
     @data_loaded
+    def _load_cell_meta_labels(self,
+                               h5file: h5py.File or None = None):
+        """
+        Load single cell meta labels from disk
+
+        Parameters
+        ----------
+        h5file: h5py.File, optional
+            Open handle to the FileGroup HDF5 file; if not given, the file is opened for reading
+
+        Returns
+        -------
+        None
+        """
+        if h5file is None:
+            with h5py.File(self.h5path, "r", **HDF5_READ_KWARGS) as f:
+                return self._load_cell_meta_labels(h5file=f)
+        if "cell_meta_labels" in h5file.keys():
+            for meta in h5file["cell_meta_labels"].keys():
+                self.cell_meta_labels[meta] = np.array(h5file[f"cell_meta_labels/{meta}"][:],
+                                                       dtype="U")
+
     def _load_population_indexes(self):
         """
-        Load population level event index data from disk
+        Defer loading of population level event index data; the index of each population
+        is read from disk the first time Population.index is accessed, so loading a
+        FileGroup only to inspect population metadata does not materialise every index.
 
         Returns
         -------
         None
         """
-        with h5py.File(self.h5path, "r") as f:
-            for p in self.populations:
-                primary_index = h5_read_population_primary_index(population_name=p.population_name,
-                                                                 h5file=f)
-                if primary_index is None:
-                    continue
-                p.index = primary_index
+        for p in self.populations:
+            p.defer_index(partial(self._read_population_index, p.population_name))
+
+    @data_loaded
+    def _read_population_index(self,
+                               population_name: str,
+                               h5file: h5py.File or None = None) -> np.ndarray or None:
+        """
+        Read the event index of a single population from disk. If no file handle is given,
+        the file is opened once and the index of every other population still waiting to be
+        read is loaded at the same time, so accessing Population.index one population after
+        another does not reopen the file for each population.
+
+        Parameters
+        ----------
+        population_name: str
+        h5file: h5py.File, optional
+            Open handle to the FileGroup HDF5 file; if not given, the file is opened for reading
+
+        Returns
+        -------
+        numpy.ndarray or None
+            None if the population has no index stored on disk
+        """
+        if population_name not in self._stored_indexes:
+            return None
+        if h5file is None:
+            pending = [p for p in self.populations
+                       if not p.index_loaded and p.population_name in self._stored_indexes
+                       and p.population_name != population_name]
+            with h5py.File(self.h5path, "r", **HDF5_READ_KWARGS) as f:
+                indexes = h5_read_population_primary_indexes(
+                    population_names=[population_name] + [p.population_name for p in pending],
+                    h5file=f)
+            for p in pending:
+                if p.population_name in indexes:
+                    p.index = indexes[p.population_name]
+                    p.mark_index_stored()
+            return indexes.get(population_name)
+        return h5_read_population_primary_index(population_name=population_name, h5file=h5file)
+
+    @data_loaded
+    def _load_pending_indexes(self,
+                              populations: List[Population]):
+        """
+        Read the index of each of the given populations that has not yet been loaded from
+        disk, sharing a single handle to the HDF5 file rather than opening it once per
+        population (see h5_read_population_primary_indexes).
+
+        Parameters
+        ----------
+        populations: list
+            List of Population objects
+
+        Returns
+        -------
+        None
+        """
+        pending = [p for p in populations
+                   if not p.index_loaded and p.population_name in self._stored_indexes]
+        if not pending:
+            return
+        with h5py.File(self.h5path, "r", **HDF5_READ_KWARGS) as f:
+            indexes = h5_read_population_primary_indexes(population_names=[p.population_name for p in pending],
+                                                         h5file=f)
+        for p in pending:
+            if p.population_name in indexes:
+                p.index = indexes[p.population_name]
+                p.mark_index_stored()
 
     def add_population(self,
                        population: Population):
@@ -404,6 +630,7 @@ class FileGroup(mongoengine.Document):
         self.populations.append(population)
         self.tree[population.population_name] = anytree.Node(name=population.population_name,
                                                              parent=self.tree.get(population.parent))
+        self._tree_render = None
 
     def update_population(self,
                           pop: Population):
@@ -419,10 +646,15 @@ class FileGroup(mongoengine.Document):
         Returns
         -------
         None
+
+        Raises
+        ------
+        MissingPopulationError
+            If population doesn't exist
         """
-        assert pop.population_name in self.list_populations(), 'Invalid population, does not exist'
-        self.populations = [p for p in self.populations if p.population_name != pop.population_name]
-        self.populations.append(pop)
+        if pop.population_name not in self.tree:
+            raise MissingPopulationError('Invalid population, does not exist')
+        self.populations[self._population_position(pop.population_name)] = pop
 
     def load_ctrl_population_df(self,
                                 ctrl: str,
@@ -487,7 +719,7 @@ class FileGroup(mongoengine.Document):
 
         Raises
         ------
-        AssertionError
+        MissingPopulationError
             If desired population is not found in the primary staining
 
         MissingControlError
@@ -500,7 +732,8 @@ class FileGroup(mongoengine.Document):
         transform_kwargs = transform_kwargs or {}
         feedback = vprint(verbose=verbose)
         classifier = build_sklearn_model(klass=classifier, **params)
-        assert population in self.list_populations(), f"Desired population {population} not found"
+        if population not in self.tree:
+            raise MissingPopulationError(f"Desired population {population} not found")
         feedback(f"====== Estimating {population} for {ctrl} control ======")
         feedback("Loading data...")
         training, ctrl, transformer = _load_data_for_ctrl_estimate(filegroup=self,
@@ -575,7 +808,7 @@ class FileGroup(mongoengine.Document):
         """
         assert population in self.tree.keys(), f"Invalid population, {population} does not exist"
         idx = self.get_population(population_name=population).index
-        data = self.data(source="primary").loc[idx]
+        data = self._read_events(source="primary", rows=idx)
         if transform is not None:
             features_to_transform = features_to_transform or list(data.columns)
             transform_kwargs = transform_kwargs or {}
@@ -601,7 +834,8 @@ class FileGroup(mongoengine.Document):
         there are subsequent populations belonging to this CD4+ population in a tree
         like: "CD4+ -> CD4+CD25+ -> CD4+CD25+CD45RA+" then the population label column
         will contain the name of the lowest possible "leaf" population that an event is
-        assigned too.
+        assigned too. The column is categorical, with the parent and downstream populations
+        as categories.
 
         Parameters
         ----------
@@ -612,13 +846,23 @@ class FileGroup(mongoengine.Document):
         -------
         Pandas.DataFrame
         """
-
-        data["population_label"] = None
         dependencies = self.list_downstream_populations(parent)
-        for pop in dependencies:
-            idx = self.get_population(pop).index
-            data.loc[idx, 'population_label'] = pop
-        data["population_label"].fillna(parent, inplace=True)
+        dependencies = [self.get_population(pop) for pop in dependencies]
+        self._load_pending_indexes(dependencies)
+        # Labels are stored as categorical codes; code 0 is the parent population
+        categories = [parent] + [pop.population_name for pop in dependencies]
+        codes = np.zeros(data.shape[0], dtype=np.int16 if len(categories) < 2 ** 15 else np.int32)
+        events = data.index.values
+        sorted_events = data.index.is_monotonic_increasing
+        for code, pop in enumerate(dependencies, start=1):
+            # Row positions of the population's events; data is indexed by event position, which
+            # is sorted for any population loaded from disk, so a binary search suffices
+            if sorted_events:
+                positions = np.searchsorted(events, pop.index)
+            else:
+                positions = data.index.get_indexer(pop.index)
+            codes[positions] = code
+        data["population_label"] = pd.Categorical.from_codes(codes, categories=categories)
         return data
 
     def _hdf5_exists(self):
@@ -646,6 +890,7 @@ class FileGroup(mongoengine.Document):
                               path: str or None = None):
         """
         Print population tree to stdout or save as an image if 'image' is True.
+        The rendered tree is kept until populations are next added or deleted.
 
         Parameters
         ----------
@@ -664,8 +909,9 @@ class FileGroup(mongoengine.Document):
             from anytree.exporter import DotExporter
             path = path or f'{os.getcwd()}/{self.id}_population_tree.png'
             DotExporter(root).to_picture(path)
-        for pre, fill, node in anytree.RenderTree(root):
-            print('%s%s' % (pre, node.name))
+        if self._tree_render is None:
+            self._tree_render = "\n".join('%s%s' % (pre, node.name) for pre, fill, node in anytree.RenderTree(root))
+        print(self._tree_render)
 
     def delete_populations(self, populations: list or str) -> None:
         """
@@ -692,20 +938,29 @@ class FileGroup(mongoengine.Document):
                 self.tree[p.population_name].parent = None
             self.populations = [p for p in self.populations if p.population_name == "root"]
             self.tree = {name: node for name, node in self.tree.items() if name == "root"}
+            self._tree_render = None
         else:
             assert isinstance(populations, list), "Provide a list of population names for removal"
             assert "root" not in populations, "Cannot delete root population"
-            downstream_effects = [self.list_downstream_populations(p) for p in populations]
-            downstream_effects = set([x for sl in downstream_effects for x in sl])
+            # Walk each subtree once; populations already collected as descendants of another
+            # population listed for deletion are not walked again
+            removed = set()
+            for name in populations:
+                if name not in removed:
+                    removed.add(name)
+                    removed.update(self.list_downstream_populations(name))
+            downstream_effects = removed.difference(populations)
             if len(downstream_effects) > 0:
                 warn("The following populations are downstream of one or more of the "
                      "populations listed for deletion and will therefore be deleted: "
                      f"{downstream_effects}")
-            populations = list(set(list(downstream_effects) + populations))
-            self.populations = [p for p in self.populations if p.population_name not in populations]
-            for name in populations:
-                self.tree[name].parent = None
-            self.tree = {name: node for name, node in self.tree.items() if name not in populations}
+            self.populations = [p for p in self.populations if p.population_name not in removed]
+            # Detaching the top of each removed subtree detaches its descendants with it
+            for name in removed:
+                if self.tree[name].parent.name not in removed:
+                    self.tree[name].parent = None
+            self.tree = {name: node for name, node in self.tree.items() if name not in removed}
+            self._tree_render = None
 
     def get_population(self,
                        population_name: str) -> Population:
@@ -727,9 +982,33 @@ class FileGroup(mongoengine.Document):
         MissingPopulationError
             If population doesn't exist
         """
-        if population_name not in list(self.list_populations()):
+        position = self._population_position(population_name)
+        if position is None:
             raise MissingPopulationError(f'Population {population_name} does not exist')
-        return [p for p in self.populations if p.population_name == population_name][0]
+        return self.populations[position]
+
+    def _population_position(self,
+                             population_name: str) -> int or None:
+        """
+        Position of the named population in the populations list. Positions are cached by
+        name; a cached position is verified before use and the cache rebuilt if the list has
+        changed, so lookups are O(1) whilst the list is unchanged.
+
+        Parameters
+        ----------
+        population_name: str
+
+        Returns
+        -------
+        int or None
+            None if the population does not exist
+        """
+        position = self._population_positions.get(population_name)
+        if (position is None or position >= len(self.populations) or
+                self.populations[position].population_name != population_name):
+            self._population_positions = {p.population_name: i for i, p in enumerate(self.populations)}
+            position = self._population_positions.get(population_name)
+        return position
 
     def get_population_by_parent(self,
                                  parent: str) -> Generator:
@@ -752,7 +1031,8 @@ class FileGroup(mongoengine.Document):
 
     def list_downstream_populations(self,
                                     population: str) -> list or None:
-        """For a given population find all dependencies
+        """For a given population find all dependencies; the subtree below the population
+        is walked directly (in pre-order) rather than testing the path of every node in the tree.
 
         Parameters
         ----------
@@ -771,10 +1051,7 @@ class FileGroup(mongoengine.Document):
         """
         assert population in self.tree.keys(), f'population {population} does not exist; ' \
                                                f'valid population names include: {self.tree.keys()}'
-        root = self.tree['root']
-        node = self.tree[population]
-        dependencies = [x.name for x in anytree.findall(root, filter_=lambda n: node in n.path)]
-        return [p for p in dependencies if p != population]
+        return [x.name for x in self.tree[population].descendants]
 
     def merge_gate_populations(self,
                                left: Population or str,
@@ -802,6 +1079,7 @@ class FileGroup(mongoengine.Document):
             left = self.get_population(left)
         if isinstance(right, str):
             right = self.get_population(right)
+        self._load_pending_indexes([left, right])
         self.add_population(merge_gate_populations(left=left, right=right, new_population_name=new_population_name))
 
     def merge_non_geom_populations(self,
@@ -835,6 +1113,7 @@ class FileGroup(mongoengine.Document):
                 pops.append(p)
             else:
                 raise ValueError("populations should be a list of strings or list of Population objects")
+        self._load_pending_indexes(pops)
         self.add_population(merge_non_geom_populations(populations=pops, new_population_name=new_population_name))
 
     def subtract_populations(self,
@@ -873,14 +1152,14 @@ class FileGroup(mongoengine.Document):
         assert same_parent or downstream, "Right population should share the same parent as the " \
                                           "left population or be downstream of the left population"
         new_population_name = new_population_name or f"subtract_{left.population_name}_{right.population_name}"
-        new_idx = np.setdiff1d(left.index, right.index)
+        new_idx = np.setdiff1d(left.index, right.index, assume_unique=True)
         x, y = left.geom.x, left.geom.y
         transform_x, transform_y = left.geom.transform_x, left.geom.transform_y
         parent_data = self.load_population_df(population=left.parent,
                                               transform={x: transform_x,
                                                          y: transform_y})
-        x_values, y_values = create_convex_hull(x_values=parent_data.loc[new_idx][x].values,
-                                                y_values=parent_data.loc[new_idx][y].values)
+        xy = parent_data.loc[new_idx, [x, y]].values
+        x_values, y_values = create_convex_hull(x_values=xy[:, 0], y_values=xy[:, 1])
         new_geom = PolygonGeom(x=x,
                                y=y,
                                transform_x=transform_x,
@@ -892,27 +1171,44 @@ class FileGroup(mongoengine.Document):
                                     n=len(new_idx),
                                     index=new_idx,
                                     geom=new_geom,
-                                    warnings=left.warnings + right.warnings + ["SUBTRACTED POPULATION"])
+                                    warnings=[*left.warnings, *right.warnings, "SUBTRACTED POPULATION"])
         self.add_population(population=new_population)
 
     def _write_populations(self):
         """
-        Write population data to disk.
+        Write population data to disk. Indexes are sorted and deduplicated before writing
+        (flagged by the "sorted" attribute of each dataset), so reloaded populations can be
+        merged and compared without re-sorting. Only indexes assigned since they were last
+        read from or written to disk are written (see Population.index_modified).
 
         Returns
         -------
         None
         """
-        root_n = self.get_population("root").n
+        for p in self.populations:
+            if p.index_modified and p.index.size > 1 and not np.all(p.index[1:] > p.index[:-1]):
+                p.index = np.unique(p.index)
+        population_n = {p.population_name: p.n for p in self.populations}
+        root_n = population_n["root"]
+        index_dtype = np.int32 if root_n <= np.iinfo(np.int32).max else np.int64
         with h5py.File(self.h5path, "r+") as f:
             for meta, labels in self.cell_meta_labels.items():
-                ascii_labels = np.array([x.encode("ascii", "ignore") for x in labels])
+                ascii_labels = np.char.encode(np.asarray(labels, dtype="U"), "ascii", "ignore")
                 overwrite_or_create(file=f, data=ascii_labels, key=f"/cell_meta_labels/{meta}")
             for p in self.populations:
-                parent_n = self.get_population(p.parent).n
-                p._prop_of_parent = p.n / parent_n
+                p.prop_of_parent = p.n / population_n[p.parent]
                 p.prop_of_total = p.n / root_n
-                overwrite_or_create(file=f, data=p.index, key=f"/index/{p.population_name}/primary")
+                if not p.index_modified:
+                    # Index is unchanged since it was read from (or written to) disk; nothing to write
+                    continue
+                data, attrs = encode_index(p.index.astype(index_dtype, copy=False))
+                overwrite_or_create(file=f,
+                                    data=data,
+                                    key=f"/index/{p.population_name}/primary",
+                                    **index_dataset_kwargs(data))
+                f[f"/index/{p.population_name}/primary"].attrs.update({"sorted": True, **attrs})
+                self._stored_indexes.add(p.population_name)
+                p.mark_index_stored()
 
     def population_stats(self,
                          population: str,
@@ -1010,7 +1306,8 @@ class FileGroup(mongoengine.Document):
 
 def overwrite_or_create(file: h5py.File,
                         data: np.ndarray,
-                        key: str):
+                        key: str,
+                        **kwargs):
     """
     Check if node exists in hdf5 file. If it does exist, overwrite with the given
     array otherwise create a new dataset.
@@ -1020,6 +1317,8 @@ def overwrite_or_create(file: h5py.File,
     file: h5py File object
     data: Numpy Array
     key: str
+    kwargs:
+        Additional keyword arguments passed to h5py.File.create_dataset (e.g. compression filters)
 
     Returns
     -------
@@ -1027,14 +1326,68 @@ def overwrite_or_create(file: h5py.File,
     """
     if key in file:
         del file[key]
-    file.create_dataset(key, data=data)
+    file.create_dataset(key, data=data, **kwargs)
+
+
+def encode_index(index: np.ndarray) -> (np.ndarray, dict):
+    """
+    Encode a sorted population index for storage. Indexes of at least MIN_COMPRESSED_INDEX_SIZE
+    events are stored as the gaps between consecutive events, in the smallest unsigned integer
+    type that holds the largest gap; for a dense population this is one or two bytes per event
+    rather than four, before compression. The first event and the dtype of the index are
+    returned as dataset attributes so that the index can be restored (see _read_index_dataset).
+    Smaller indexes are stored as is.
+
+    Parameters
+    ----------
+    index: Numpy Array
+        Sorted index
+
+    Returns
+    -------
+    Numpy Array, dict
+        Data to store and the dataset attributes describing the encoding
+    """
+    if len(index) < MIN_COMPRESSED_INDEX_SIZE:
+        return index, {}
+    gaps = np.diff(index)
+    deltas = np.empty(len(index), dtype=np.min_scalar_type(int(gaps.max())))
+    deltas[0] = 0
+    deltas[1:] = gaps
+    return deltas, {"encoding": "delta", "start": int(index[0]), "index_dtype": index.dtype.str}
+
+
+def index_dataset_kwargs(index: np.ndarray) -> dict:
+    """
+    Storage options for a population index dataset. Event indexes are sorted integers
+    that compress well once byte-shuffled, so indexes are written with the shuffle filter
+    and light gzip compression. Compression requires a chunked layout, which for a small
+    population (fewer than MIN_COMPRESSED_INDEX_SIZE events, including zero-length datasets
+    which cannot be chunked at all) adds more per-dataset metadata than it saves; these are
+    stored contiguously without filters. Larger indexes are split into chunks of roughly
+    INDEX_CHUNK_BYTES.
+
+    Parameters
+    ----------
+    index: Numpy Array
+
+    Returns
+    -------
+    dict
+        Keyword arguments for h5py.File.create_dataset
+    """
+    if len(index) < MIN_COMPRESSED_INDEX_SIZE:
+        return {}
+    chunk_len = max(1, min(len(index), INDEX_CHUNK_BYTES // index.itemsize))
+    return {"chunks": (chunk_len,), "compression": "gzip", "compression_opts": 1, "shuffle": True}
 
 
 def population_stats(filegroup: FileGroup) -> pd.DataFrame:
     """
     Given a FileGroup generate a DataFrame detailing the number of events, proportion
     of parent population, and proportion of total (root population) for each
-    population in the FileGroup.
+    population in the FileGroup. Statistics are computed in a single pass over
+    the population metadata; population indexes are not read.
 
     Parameters
     ----------
@@ -1044,8 +1397,13 @@ def population_stats(filegroup: FileGroup) -> pd.DataFrame:
     -------
     Pandas.DataFrame
     """
-    return pd.DataFrame([filegroup.population_stats(p)
-                         for p in list(filegroup.list_populations())])
+    population_n = {p.population_name: p.n for p in filegroup.populations}
+    root_n = population_n["root"]
+    return pd.DataFrame([{"population_name": p.population_name,
+                          "n": p.n,
+                          "frac_of_parent": p.n / population_n[p.parent],
+                          "frac_of_root": p.n / root_n}
+                         for p in filegroup.populations])
 
 
 def _load_data_for_ctrl_estimate(filegroup: FileGroup,
@@ -1078,17 +1436,16 @@ def _load_data_for_ctrl_estimate(filegroup: FileGroup,
     Pandas.DataFrame, Pandas.DataFrame, Transformer
     """
     training = filegroup.data(source="primary")
-    population_idx = filegroup.get_population(target_population).index
-    training["label"] = 0
-    training.loc[population_idx, "label"] = 1
+    labels = np.zeros(training.shape[0], dtype=np.int8)
+    labels[filegroup.get_population(target_population).index] = 1
     ctrl = filegroup.data(source=ctrl)
     time_columns = training.columns[training.columns.str.contains("time", flags=re.IGNORECASE)].to_list()
     for t in time_columns:
         training.drop(t, axis=1, inplace=True)
         ctrl.drop(t, axis=1, inplace=True)
-    features = [x for x in training.columns if x != "label"]
+    features = list(training.columns)
     sampler = RandomOverSampler(random_state=42)
-    x_resampled, y_resampled = sampler.fit_resample(training[features].values, training["label"].values)
+    x_resampled, y_resampled = sampler.fit_resample(training.values, labels)
     training = pd.DataFrame(x_resampled, columns=features)
     training["label"] = y_resampled
     if training.shape[0] > sample_size:
@@ -32,9 +32,9 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import typing
 
 from cytopy.flow.transform import apply_transform
-from .geometry import ThresholdGeom, PolygonGeom, inside_polygon, \
-    create_convex_hull, create_polygon, ellipse_to_polygon, probablistic_ellipse
-from .population import Population, merge_multiple_gate_populations
+from .geometry import ThresholdGeom, PolygonGeom, polygon_contains, \
+    create_convex_hull, create_polygon, ellipse_to_polygon, probablistic_ellipse, polygon_vertices
+from .population import Population, merge_multiple_gate_populations, create_signature
 from ..flow.sampling import faithful_downsampling, density_dependent_downsampling, upsample_knn, uniform_downsampling
 from ..flow.dim_reduction import dimensionality_reduction
 from ..flow.build_models import build_sklearn_model
@@ -111,8 +111,7 @@ class ChildThreshold(Child):
         -------
         bool
         """
-        definition = definition.split(",")
-        return any([x in self.definition.split(",") for x in definition])
+        return not set(self.definition.split(",")).isdisjoint(definition.split(","))
 
 
 class ChildPolygon(Child):
@@ -225,16 +224,58 @@ class Gate(mongoengine.Document):
         method = values.get("method", None)
         assert method is not None, "No method given"
         err = f"Module {method} not supported. See docs for supported methods."
-        assert method in ["manual", "density", "quantile", "time", "AND", "OR", "NOT"] + list(globals().keys()), err
+        assert method in ("manual", "density", "quantile", "time", "AND", "OR", "NOT") or method in globals(), err
+        # Documents loaded from the database (_created=False) were validated when saved
+        from_db = not values.get("_created", True)
         super().__init__(*args, **values)
+        # Gates loaded from the database are unmodified until a field is assigned (see modified)
+        self._modified = not from_db
         self.model = None
         self.x_transformer = None
         self.y_transformer = None
+        if from_db:
+            return
         if self.ctrl_classifier:
             params = self.ctrl_classifier_params or {}
             build_sklearn_model(klass=self.ctrl_classifier, **params)
         self.validate()
 
+    def __setattr__(self, name, value):
+        if isinstance(getattr(type(self), name, None), mongoengine.base.BaseField) and hasattr(self, "_modified"):
+            super().__setattr__("_modified", True)
+        super().__setattr__(name, value)
+
+    @property
+    def modified(self) -> bool:
+        """
+        True if the gate has never been saved, or if a field has been assigned (or children added or
+        relabelled) since it was loaded or last saved. Fields modified in place (e.g. editing the
+        method_kwargs dictionary) are not detected; call mark_modified after such edits.
+        """
+        return self._modified
+
+    def mark_modified(self):
+        """
+        Flag this gate as modified, so that it is written when the GatingStrategy is saved
+
+        Returns
+        -------
+        None
+        """
+        self._modified = True
+
+    def save(self, *args, **kwargs):
+        """
+        Save the gate (see mongoengine.Document.save) and clear the modified flag
+
+        Returns
+        -------
+        Gate
+        """
+        saved = super().save(*args, **kwargs)
+        self._modified = False
+        return saved
+
     def transform(self,
                   data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -249,6 +290,16 @@ class Gate(mongoengine.Document):
         Pandas.DataFrame
             Transformed dataframe
         """
+        if self.transform_x is not None and self.y not in (None, self.x) and self.transform_y == self.transform_x \
+                and (self.transform_y_kwargs or {}) == (self.transform_x_kwargs or {}):
+            # Same transform on both axes; transform both features with a single copy of the data
+            data, self.x_transformer = apply_transform(data=data,
+                                                       features=[self.x, self.y],
+                                                       method=self.transform_x,
+                                                       return_transformer=True,
+                                                       **(self.transform_x_kwargs or {}))
+            self.y_transformer = self.x_transformer
+            return data
         if self.transform_x is not None:
             kwargs = self.transform_x_kwargs or {}
             data, self.x_transformer = apply_transform(data=data,
@@ -301,7 +352,6 @@ class Gate(mongoengine.Document):
         AssertionError
             If sampling kwargs are missing
         """
-        data = data.copy()
         if self.sampling.get("method", None) == "uniform":
             n = self.sampling.get("n", None) or self.sampling.get("frac", None)
             assert n is not None, "Must provide 'n' or 'frac' for uniform downsampling"
@@ -339,13 +389,10 @@ class Gate(mongoengine.Document):
         -------
         list
         """
-        sample = sample.copy()
-        sample["label"] = None
+        # Populations index a subset of the sampled events; label each by row position
+        labels = np.full(sample.shape[0], -1)
         for i, p in enumerate(populations):
-            sample.loc[sample.index.isin(p.index), "label"] = i
-        sample["label"].fillna(-1, inplace=True)
-        labels = sample["label"].values
-        sample.drop("label", axis=1, inplace=True)
+            labels[sample.index.get_indexer(p.index)] = i
         new_labels = upsample_knn(sample=sample,
                                   original_data=data,
                                   labels=labels,
@@ -353,8 +400,12 @@ class Gate(mongoengine.Document):
                                   verbose=self.sampling.get("verbose", True),
                                   scoring=self.sampling.get("upsample_scoring", "balanced_accuracy"),
                                   **self.sampling.get("knn_kwargs", {}))
+        # Group events by label in a single (stable) sort rather than a scan per population
+        new_labels = np.asarray(new_labels)
+        order = np.argsort(new_labels, kind="stable")
+        bounds = np.searchsorted(new_labels[order], np.arange(len(populations) + 1))
         for i, p in enumerate(populations):
-            new_idx = data.index.values[np.where(new_labels == i)]
+            new_idx = data.index.values[order[bounds[i]:bounds[i + 1]]]
             if len(new_idx) == 0:
                 raise ValueError(f"Up-sampling failed, no events labelled for {p.population_name}")
             p.index = new_idx
@@ -550,6 +601,7 @@ class ThresholdGate(Gate):
         child.geom.transform_x_kwargs = self.transform_x_kwargs
         child.geom.transform_y_kwargs = self.transform_y_kwargs
         self.children.append(child)
+        self.mark_modified()
 
     def _duplicate_children(self) -> None:
         """
@@ -589,6 +641,7 @@ class ThresholdGate(Gate):
         """
         for c in self.children:
             c.name = labels.get(c.name)
+        self.mark_modified()
         self._duplicate_children()
 
     def _match_to_children(self,
@@ -1040,7 +1093,7 @@ class ThresholdGate(Gate):
                                    n=df.shape[0],
                                    source="gate",
                                    index=df.index.values,
-                                   signature=df.mean().to_dict(),
+                                   signature=create_signature(df),
                                    geom=ThresholdGeom(x=self.x,
                                                       y=self.y,
                                                       transform_x=self.transform_x,
@@ -1124,7 +1177,8 @@ class PolygonGate(Gate):
                               polygons: List[ShapelyPoly]) -> List[Population]:
         """
         Given a dataframe and a list of Polygon shapes as generated from the '_fit' method, generate a
-        list of Population objects.
+        list of Population objects. The gated coordinates are extracted once and each population is
+        described by the positions of its events, rather than a copy of the dataframe per polygon.
 
         Parameters
         ----------
@@ -1136,24 +1190,26 @@ class PolygonGate(Gate):
         List
             List of Population objects
         """
+        xy = data[[self.x, self.y]].values
         pops = list()
         for name, poly in zip(ascii_uppercase, polygons):
-            pop_df = inside_polygon(df=data, x=self.x, y=self.y, poly=poly)
+            idx = np.flatnonzero(polygon_contains(poly, xy[:, 0], xy[:, 1]))
+            x_values, y_values = polygon_vertices(poly)
             geom = PolygonGeom(x=self.x,
                                y=self.y,
                                transform_x=self.transform_x,
                                transform_y=self.transform_y,
                                transform_x_kwargs=self.transform_x_kwargs,
                                transform_y_kwargs=self.transform_y_kwargs,
-                               x_values=poly.exterior.xy[0],
-                               y_values=poly.exterior.xy[1])
+                               x_values=x_values,
+                               y_values=y_values)
             pops.append(Population(population_name=name,
                                    source="gate",
                                    parent=self.parent,
-                                   n=pop_df.shape[0],
-                                   signature=pop_df.mean().to_dict(),
+                                   n=idx.shape[0],
+                                   signature=create_signature(data, idx=idx),
                                    geom=geom,
-                                   index=pop_df.index.values))
+                                   index=data.index.values[idx]))
         return pops
 
     def label_children(self,
@@ -1187,6 +1243,7 @@ class PolygonGate(Gate):
             self.children = [c for c in self.children if c.name in labels.keys()]
         for c in self.children:
             c.name = labels.get(c.name)
+        self.mark_modified()
 
     def add_child(self,
                   child: ChildPolygon) -> None:
@@ -1217,6 +1274,7 @@ class PolygonGate(Gate):
         if not isinstance(child.geom.y_values, list):
             raise TypeError("ChildPolygon y_values should be of type list")
         self.children.append(child)
+        self.mark_modified()
 
     def _match_to_children(self,
                            new_populations: List[Population]) -> List[Population]:
@@ -1264,12 +1322,12 @@ class PolygonGate(Gate):
         if self.transform_x:
             kwargs = self.transform_x_kwargs or {}
             x_values = apply_transform(pd.DataFrame({"x": x_values}),
-                                       features="x",
+                                       features=["x"],
                                        method=self.transform_x, **kwargs).x.values
         if self.transform_y:
             kwargs = self.transform_y_kwargs or {}
             y_values = apply_transform(pd.DataFrame({"y": y_values}),
-                                       features="y",
+                                       features=["y"],
                                        method=self.transform_y, **kwargs).y.values
         return create_polygon(x_values, y_values)
 
@@ -1295,10 +1353,12 @@ class PolygonGate(Gate):
         self._xy_in_dataframe(data=data)
         if self.sampling.get("method", None) is not None:
             data = self._downsample(data=data)
-        labels = self.model.fit_predict(data[[self.x, self.y]])
-        hulls = [create_convex_hull(x_values=data.iloc[np.where(labels == i)][self.x].values,
-                                    y_values=data.iloc[np.where(labels == i)][self.y].values)
-                 for i in np.unique(labels)]
+        xy = data[[self.x, self.y]].values
+        labels = np.asarray(self.model.fit_predict(xy))
+        # Group the events of each label (in label order) with a single stable sort
+        order = np.argsort(labels, kind="stable")
+        groups = np.split(xy[order], np.flatnonzero(np.diff(labels[order])) + 1) if labels.size > 0 else []
+        hulls = [create_convex_hull(x_values=g[:, 0], y_values=g[:, 1]) for g in groups]
         hulls = [x for x in hulls if len(x[0]) > 0]
         return [create_polygon(*x) for x in hulls]
 
@@ -1332,9 +1392,10 @@ class PolygonGate(Gate):
         data = self._dim_reduction(data=data)
         polygons = self._fit(data=data)
         for name, poly in zip(ascii_uppercase, polygons):
+            x_values, y_values = polygon_vertices(poly)
             self.add_child(ChildPolygon(name=name,
-                                        geom=PolygonGeom(x_values=poly.exterior.xy[0].tolist(),
-                                                         y_values=poly.exterior.xy[1].tolist())))
+                                        geom=PolygonGeom(x_values=x_values,
+                                                         y_values=y_values)))
 
     def fit_predict(self,
                     data: pd.DataFrame,
@@ -1364,7 +1425,7 @@ class PolygonGate(Gate):
         assert len(self.children) > 0, "No children defined for gate, call 'fit' before calling 'fit_predict'"
         data = self.transform(data=data)
         data = self._dim_reduction(data=data)
-        return self._match_to_children(self._generate_populations(data=data.copy(),
+        return self._match_to_children(self._generate_populations(data=data,
                                                                   polygons=self._fit(data=data)))
 
     def predict(self,
@@ -1584,8 +1645,8 @@ class BooleanGate(PolygonGate):
         Pandas.DataFrame
             New population dataframe
         """
-        idx = np.unique(np.concatenate([df.index.values for df in data], axis=0), axis=0)
-        return pd.concat(data).drop_duplicates().loc[idx].copy()
+        combined = pd.concat(data)
+        return combined[~combined.index.duplicated()].sort_index()
 
     def _and(self, data: List[pd.DataFrame]) -> pd.DataFrame:
         """
@@ -1602,8 +1663,9 @@ class BooleanGate(PolygonGate):
         Pandas.DataFrame
             New population dataframe
         """
-        idx = reduce(np.intersect1d, [df.index.values for df in data])
-        return pd.concat(data).drop_duplicates().loc[idx].copy()
+        bits, size = packed_membership([df.index.values for df in data])
+        idx = np.flatnonzero(np.unpackbits(np.bitwise_and.reduce(bits, axis=0), count=size))
+        return data[0].loc[idx]
 
     def _not(self,
              data: List[pd.DataFrame]) -> pd.DataFrame:
@@ -1622,9 +1684,10 @@ class BooleanGate(PolygonGate):
             New population dataframe
         """
         target = data[0]
-        subtraction_index = np.unique(np.concatenate([df.index.values for df in data[1:]], axis=0), axis=0)
-        idx = np.setdiff1d(target.index.values, subtraction_index)
-        return pd.concat(data).drop_duplicates().loc[idx].copy()
+        bits, size = packed_membership([df.index.values for df in data])
+        subtract = np.unpackbits(np.bitwise_or.reduce(bits[1:], axis=0), count=size).astype(bool)
+        keep = ~subtract[target.index.values]
+        return target[keep]
 
     def _fit(self,
              data: List[pd.DataFrame]) -> (ShapelyPoly, pd.DataFrame):
@@ -1674,9 +1737,10 @@ class BooleanGate(PolygonGate):
         """
         data = [self.transform(x) for x in data]
         poly, _ = self._fit(data=data)
+        x_values, y_values = polygon_vertices(poly)
         self.add_child(ChildPolygon(name="A",
-                                    geom=PolygonGeom(x_values=poly.exterior.xy[0].tolist(),
-                                                     y_values=poly.exterior.xy[1].tolist())))
+                                    geom=PolygonGeom(x_values=x_values,
+                                                     y_values=y_values)))
 
     def fit_predict(self,
                     data: List[pd.DataFrame],
@@ -1708,6 +1772,35 @@ class BooleanGate(PolygonGate):
         return [pop]
 
 
+def packed_membership(indexes: List[np.ndarray]) -> (np.ndarray, int):
+    """
+    Encode the membership of events in a set of populations as a bit-matrix, with one row
+    of packed bits (numpy.packbits) per population and one bit per event. Intersections and
+    unions across populations are then a single bitwise reduction over the rows
+    (numpy.bitwise_and.reduce/numpy.bitwise_or.reduce) rather than repeated hash or sort
+    based set operations on the raw indexes.
+
+    Parameters
+    ----------
+    indexes: list
+        List of population indexes (non-negative integer event indexes)
+
+    Returns
+    -------
+    numpy.ndarray, int
+        Packed bit-matrix of shape (number of populations, ceil(size/8)) and the number of
+        events (size) it encodes; pass size as 'count' to numpy.unpackbits
+    """
+    size = max([int(idx.max()) + 1 for idx in indexes if len(idx) > 0], default=0)
+    bits = np.zeros((len(indexes), (size + 7) // 8), dtype=np.uint8)
+    row = np.zeros(size, dtype=bool)
+    for i, idx in enumerate(indexes):
+        row[:] = False
+        row[idx] = True
+        bits[i] = np.packbits(row)
+    return bits, size
+
+
 def merge_children(children: list) -> Child or ChildThreshold or ChildPolygon:
     """
     Given a list of Child objects, merge and return single child
@@ -1727,7 +1820,7 @@ def merge_children(children: list) -> Child or ChildThreshold or ChildPolygon:
     """
     assert len(set([type(x) for x in children])) == 1, \
         f"Children must be of same type; not, {[type(x) for x in children]}"
-    assert len(set([c.name for c in children])), "Children should all have the same name"
+    assert len(set(c.name for c in children)) == 1, "Children should all have the same name"
     if isinstance(children[0], ChildThreshold):
         definition = ",".join([c.definition for c in children])
         return ChildThreshold(name=children[0].name,
@@ -1736,7 +1829,7 @@ def merge_children(children: list) -> Child or ChildThreshold or ChildPolygon:
     if isinstance(children[0], ChildPolygon):
         merged_poly = cascaded_union([c.geom.shape for c in children])
         new_signature = pd.DataFrame([c.signature for c in children]).mean().to_dict()
-        x, y = merged_poly.exterior.xy[0], merged_poly.exterior.xy[1]
+        x, y = polygon_vertices(merged_poly)
         return ChildPolygon(name=children[0].name,
                             signature=new_signature,
                             geom=PolygonGeom(x=children[0].geom.x,
@@ -1798,7 +1891,6 @@ def threshold_1d(data: pd.DataFrame,
         Negative population (less than threshold) and positive population (greater than or equal to threshold)
         in a dictionary as so: {'-': Pandas.DataFrame, '+': Pandas.DataFrame}
     """
-    data = data.copy()
     return {"+": data[data[x] >= x_threshold],
             "-": data[data[x] < x_threshold]}
 
@@ -1828,11 +1920,13 @@ def threshold_2d(data: pd.DataFrame,
     -------
     dict
     """
-    data = data.copy()
-    return {"++": data[(data[x] >= x_threshold) & (data[y] >= y_threshold)],
-            "--": data[(data[x] < x_threshold) & (data[y] < y_threshold)],
-            "+-": data[(data[x] >= x_threshold) & (data[y] < y_threshold)],
-            "-+": data[(data[x] < x_threshold) & (data[y] >= y_threshold)]}
+    xv, yv = data[x].values, data[y].values
+    x_pos, x_neg = xv >= x_threshold, xv < x_threshold
+    y_pos, y_neg = yv >= y_threshold, yv < y_threshold
+    return {"++": data[x_pos & y_pos],
+            "--": data[x_neg & y_neg],
+            "+-": data[x_pos & y_neg],
+            "-+": data[x_neg & y_pos]}
 
 
 def find_peaks(p: np.array,
@@ -2023,22 +2117,20 @@ def update_threshold(population: Population,
     AssertionError
         If y_threshold is missing despite population y_threshold being defined
     """
+    events = parent_data.index.values
+    x = parent_data[population.geom.x].values
     if population.geom.y_threshold is None:
-        new_data = threshold_1d(data=parent_data,
-                                x=population.geom.x,
-                                x_threshold=x_threshold).get(population.definition)
-        population.index = new_data.index.values
+        mask = x >= x_threshold if population.definition == "+" else x < x_threshold
+        population.index = events[mask]
         population.geom.x_threshold = x_threshold
     else:
         assert y_threshold is not None, "2D threshold requires y_threshold"
-        new_data = threshold_2d(data=parent_data,
-                                x=population.geom.x,
-                                x_threshold=x_threshold,
-                                y=population.geom.y,
-                                y_threshold=y_threshold)
-        definitions = population.definition.split(",")
-        new_data = pd.concat([new_data.get(d) for d in definitions])
-        population.index = new_data.index.values
+        # Build one boolean mask per quadrant in the definition and select the events once
+        y = parent_data[population.geom.y].values
+        x_sides = {"+": x >= x_threshold, "-": x < x_threshold}
+        y_sides = {"+": y >= y_threshold, "-": y < y_threshold}
+        masks = [x_sides[d[0]] & y_sides[d[1]] for d in population.definition.split(",")]
+        population.index = events[reduce(np.logical_or, masks)]
         population.geom.x_threshold = x_threshold
         population.geom.y_threshold = y_threshold
     return population
@@ -2065,11 +2157,10 @@ def update_polygon(population: Population,
     Population
     """
     poly = create_polygon(x=x_values, y=y_values)
-    new_data = inside_polygon(df=parent_data,
-                              x=population.geom.x,
-                              y=population.geom.y,
-                              poly=poly)
+    mask = polygon_contains(poly=poly,
+                            x=parent_data[population.geom.x].values,
+                            y=parent_data[population.geom.y].values)
     population.geom.x_values = x_values
     population.geom.y_values = y_values
-    population.index = new_data.index.values
+    population.index = parent_data.index.values[mask]
     return population
@@ -38,6 +38,8 @@ from ..flow.fda_norm import LandmarkReg
 from .experiment import Experiment
 from .fcs import FileGroup
 from .errors import *
+from multiprocessing.pool import ThreadPool
+from multiprocessing import cpu_count
 from datetime import datetime
 from warnings import warn
 from matplotlib import gridspec
@@ -132,6 +134,7 @@ class GatingStrategy(mongoengine.Document):
         self.print = vprint(verbose=self.verbose)
         super().__init__(*args, **values)
         self.filegroup = None
+        self._population_df_cache = None
 
     def load_data(self,
                   experiment: Experiment,
@@ -177,22 +180,6 @@ class GatingStrategy(mongoengine.Document):
         assert self.filegroup is not None, "No FileGroup associated"
         return list(self.filegroup.list_populations())
 
-    def _gate_exists(self,
-                     gate: str):
-        """
-        Raises AssertionError if given gate does not exist
-
-        Returns
-        -------
-        None
-
-        Raises
-        ------
-        AssertionError
-            Gate does not exist
-        """
-        assert gate in self.list_gates(), f"Gate {gate} does not exist"
-
     def get_gate(self,
                  gate: str) -> Gate:
         """
@@ -206,8 +193,9 @@ class GatingStrategy(mongoengine.Document):
         -------
         Gate
         """
-        self._gate_exists(gate=gate)
-        return [g for g in self.gates if g.gate_name == gate][0]
+        gate_ = next((g for g in self.gates if g.gate_name == gate), None)
+        assert gate_ is not None, f"Gate {gate} does not exist"
+        return gate_
 
     def preview_gate(self,
                      gate: str or ThresholdGate or PolygonGate or EllipseGate,
@@ -299,12 +287,13 @@ class GatingStrategy(mongoengine.Document):
             Invalid metric or hyperparameters
         """
         assert gate_name in self.list_gates(), f"{gate_name} is not a valid gate"
-        if isinstance(self.get_gate(gate_name), ThresholdGate):
+        gate = self.get_gate(gate_name)
+        if isinstance(gate, ThresholdGate):
             cost = cost or "manhattan"
             valid_metrics = ["manhattan", "threshold_dist", "euclidean"]
             err = f"For threshold gate 'cost' should either be one of {valid_metrics}"
             assert cost in valid_metrics, err
-        if isinstance(self.get_gate(gate_name), PolygonGate) or isinstance(self.get_gate(gate_name), EllipseGate):
+        if isinstance(gate, (PolygonGate, EllipseGate)):
             cost = cost or "hausdorff"
             valid_metrics = ["hausdorff", "manhattan", "euclidean"]
             err = f"For threshold gate 'cost' should either be one of {valid_metrics}"
@@ -376,8 +365,7 @@ class GatingStrategy(mongoengine.Document):
             return self._load_gate_dataframes(gate=self.get_gate(gate_name), fda_norm=False)[0]
         ref = FileGroup.objects(id=self.normalisation.get(gate_name).get("reference")).get()
         kwargs = self.normalisation.get(gate_name).get("kwargs")
-        data = self.filegroup.load_population_df(population=gate.parent,
-                                                 transform=None)
+        data = self._load_population_df(population=gate.parent)
         for d, t, tkwargs in zip([gate.x, gate.y],
                                  [gate.transform_x, gate.transform_y],
                                  [gate.transform_x_kwargs, gate.transform_y_kwargs]):
@@ -386,9 +374,7 @@ class GatingStrategy(mongoengine.Document):
             ref_df = ref.load_population_df(population=gate.parent,
                                             transform=t,
                                             transform_kwargs=tkwargs)
-            target_df = self.filegroup.load_population_df(population=gate.parent,
-                                                          transform=None)
-            target_df, transformer = apply_transform(data=target_df,
+            target_df, transformer = apply_transform(data=data.copy(),
                                                      method=t,
                                                      return_transformer=True,
                                                      features=[d],
@@ -407,6 +393,50 @@ class GatingStrategy(mongoengine.Document):
             data[d] = target_df[d]
         return data
 
+    def _load_population_df(self,
+                            population: str) -> pd.DataFrame:
+        """
+        Load the (untransformed) DataFrame of a population in the associated FileGroup. Whilst
+        applying all gates (see apply_all) loaded populations are cached, so that a parent shared
+        by several gates is only read once; a copy of the cached DataFrame is returned so that a
+        Gate cannot modify the data seen by the next.
+
+        Parameters
+        ----------
+        population: str
+
+        Returns
+        -------
+        Pandas.DataFrame
+        """
+        if self._population_df_cache is None:
+            return self.filegroup.load_population_df(population=population,
+                                                     transform=None,
+                                                     label_downstream_affiliations=False)
+        return self._cached_population_df(population=population).copy()
+
+    def _cached_population_df(self,
+                              population: str) -> pd.DataFrame:
+        """
+        Return the cached (untransformed) DataFrame of a population, reading it from the
+        associated FileGroup if it is not yet cached. Only valid whilst applying all gates
+        (see apply_all); the returned DataFrame is shared and must not be modified.
+
+        Parameters
+        ----------
+        population: str
+
+        Returns
+        -------
+        Pandas.DataFrame
+        """
+        if population not in self._population_df_cache:
+            self._population_df_cache[population] = self.filegroup.load_population_df(
+                population=population,
+                transform=None,
+                label_downstream_affiliations=False)
+        return self._population_df_cache[population]
+
     def _load_gate_dataframes(self,
                               gate: Gate,
                               fda_norm: bool = False,
@@ -431,11 +461,9 @@ class GatingStrategy(mongoengine.Document):
         Pandas.DataFrame, Pandas.DataFrame or None
             Parent population, control population (if Gate is a control gate, otherwise None)
         """
-        parent = self.filegroup.load_population_df(population=gate.parent,
-                                                   transform=None,
-                                                   label_downstream_affiliations=False)
         if fda_norm:
             return self.normalise_data(gate_name=gate.gate_name), None
+        parent = self._load_population_df(population=gate.parent)
         if gate.ctrl_x is not None and ctrl:
             ctrls = {}
             ctrl_classifier_params = gate.ctrl_classifier_params or {}
@@ -479,13 +507,52 @@ class GatingStrategy(mongoengine.Document):
         List
             List of DataFrames
         """
-        parent_data = self.filegroup.load_population_df(population=gate.parent,
-                                                        transform=None,
-                                                        label_downstream_affiliations=False)
-        return [self.filegroup.load_population_df(population=pop,
-                                                  transform=None,
-                                                  label_downstream_affiliations=False)
-                for pop in gate.populations], parent_data
+        parent_data = self._load_population_df(population=gate.parent)
+        return [self._load_population_df(population=pop) for pop in gate.populations], parent_data
+
+    def _fit_gate(self,
+                  gate: typing.Union[Gate, ThresholdGate, BooleanGate, PolygonGate, EllipseGate],
+                  data: typing.Union[pd.DataFrame, list],
+                  ctrl_parent_data: typing.Union[pd.DataFrame, None] = None,
+                  verbose: bool = True,
+                  hyperparam_search: bool = True) -> list:
+        """
+        Fit a Gate to the loaded parent data and predict the resulting populations. The
+        FileGroup is not modified, so that Gates can be fitted concurrently (see apply_all).
+
+        Parameters
+        ----------
+        gate: Gate or ThresholdGate or BooleanGate or PolygonGate or EllipseGate
+        data: Pandas.DataFrame or List
+            Parent population (or list of populations for a BooleanGate)
+        ctrl_parent_data: Pandas.DataFrame, optional
+            Control population data for control gating
+        verbose: bool (default=True)
+        hyperparam_search: bool (default=True)
+            If True and hyperparameter grid has been defined for the chosen gate,
+            then hyperparameter search is performed
+
+        Returns
+        -------
+        List
+            List of Populations
+
+        Raises
+        ------
+        AssertionError
+            If control gating defined for a Gate other than a ThresholdGate
+        """
+        if gate.ctrl_x is not None:
+            assert isinstance(gate, ThresholdGate), "Control gate only supported for ThresholdGate"
+            return gate.fit_predict(data=data, ctrl_data=ctrl_parent_data)
+        if gate.gate_name in self.hyperparameter_search.keys() and hyperparam_search and not isinstance(gate,
+                                                                                                        BooleanGate):
+            return hyperparameter_gate(gate=gate,
+                                       grid=self.hyperparameter_search.get(gate.gate_name).get("grid"),
+                                       cost=self.hyperparameter_search.get(gate.gate_name).get("cost"),
+                                       parent=data,
+                                       verbose=verbose)
+        return gate.fit_predict(data=data)
 
     def apply_gate(self,
                    gate: typing.Union[str, Gate, ThresholdGate, BooleanGate, PolygonGate, EllipseGate],
@@ -559,18 +626,11 @@ class GatingStrategy(mongoengine.Document):
 
         if overwrite_method_kwargs is not None:
             gate.method_kwargs = overwrite_method_kwargs
-        if gate.ctrl_x is not None:
-            assert isinstance(gate, ThresholdGate), "Control gate only supported for ThresholdGate"
-            populations = gate.fit_predict(data=data, ctrl_data=ctrl_parent_data)
-        elif gate.gate_name in self.hyperparameter_search.keys() and hyperparam_search and not isinstance(gate,
-                                                                                                          BooleanGate):
-            populations = hyperparameter_gate(gate=gate,
-                                              grid=self.hyperparameter_search.get(gate.gate_name).get("grid"),
-                                              cost=self.hyperparameter_search.get(gate.gate_name).get("cost"),
-                                              parent=data,
-                                              verbose=verbose)
-        else:
-            populations = gate.fit_predict(data=data)
+        populations = self._fit_gate(gate=gate,
+                                     data=data,
+                                     ctrl_parent_data=ctrl_parent_data,
+                                     verbose=verbose,
+                                     hyperparam_search=hyperparam_search)
         for p in populations:
             self.filegroup.add_population(population=p)
         if verbose:
@@ -588,9 +648,16 @@ class GatingStrategy(mongoengine.Document):
     def apply_all(self,
                   verbose: bool = True,
                   fda_norm: bool = False,
-                  hyperparam_search: bool = False):
+                  hyperparam_search: bool = False,
+                  njobs: int = 1):
         """
-        Apply all the gates associated to this GatingStrategy
+        Apply all the gates associated to this GatingStrategy. Gates are applied level by
+        level; every Gate whose parent populations exist is fitted, and the resulting
+        populations are then added to the FileGroup in the order that the Gates are defined.
+        If njobs is greater than 1, the Gates of a level are loaded and fitted concurrently in
+        a pool of threads. Control estimation and normalisation (which fit their own models
+        and provide feedback) are then still performed one Gate at a time on the calling thread,
+        and feedback is only given once the populations of a level are added.
 
         Parameters
         ----------
@@ -602,6 +669,9 @@ class GatingStrategy(mongoengine.Document):
             If True and hyperparameter grid has been defined for the chosen gate,
             then hyperparameter search is performed to find the optimal fit for the
             newly encountered data.
+        njobs: int (default=1)
+            Number of threads used to fit sibling Gates. Default is 1, which fits Gates one
+            at a time; a value of -1 will use all available cores.
 
         Returns
         -------
@@ -622,38 +692,81 @@ class GatingStrategy(mongoengine.Document):
             Failure to identify populations required to apply all gates downstream of root population
         """
         feedback = vprint(verbose)
-        populations_created = [[c.name for c in g.children] for g in self.gates]
-        populations_created = [x for sl in populations_created for x in sl]
+        populations_created = {c.name for g in self.gates for c in g.children}
         assert len(self.gates) > 0, "No gates to apply"
         err = "One or more of the populations generated from this gating strategy are already " \
               "presented in the population tree"
-        if not all([x not in self.list_populations() for x in populations_created]):
+        if not populations_created.isdisjoint(self.filegroup.tree.keys()):
             raise DuplicatePopulationError(err)
+        if njobs < 0:
+            njobs = cpu_count()
         gates_to_apply = list(self.gates)
-        i = 0
-        iteration_limit = len(gates_to_apply) * 100
         feedback("=====================================================")
-        while len(gates_to_apply) > 0:
-            if i >= len(gates_to_apply):
-                i = 0
-            gate = gates_to_apply[i]
-            if gate.parent in self.list_populations():
-                if self.filegroup.population_stats(gate.parent).get("n") <= 3:
-                    raise InsufficientEventsError(f"Insufficient events in parent population {gate.parent}")
-                feedback(f"------ Applying {gate.gate_name} ------")
-                self.apply_gate(gate=gate,
-                                plot=False,
-                                verbose=verbose,
-                                add_to_strategy=False,
-                                fda_norm=fda_norm,
-                                hyperparam_search=hyperparam_search)
-                feedback("----------------------------------------")
-                gates_to_apply = [g for g in gates_to_apply if g.gate_name != gate.gate_name]
-            i += 1
-            iteration_limit -= 1
-            if iteration_limit == 0:
-                raise OverflowError("Maximum number of iterations reached. This means that one or more parent "
-                                    "populations are not being identified.")
+        self._population_df_cache = {}
+        try:
+            while len(gates_to_apply) > 0:
+                ready = [g for g in gates_to_apply if g.parent in self.filegroup.tree.keys() and
+                         (not isinstance(g, BooleanGate) or
+                          all(p in self.filegroup.tree.keys() for p in g.populations))]
+                if len(ready) == 0:
+                    raise OverflowError("No remaining gate has its parent populations available. This means that "
+                                        "one or more parent populations are not being identified.")
+                for gate in ready:
+                    if self.filegroup.population_stats(gate.parent).get("n") <= 3:
+                        raise InsufficientEventsError(f"Insufficient events in parent population {gate.parent}")
+                    # Read shared populations once, before the gates of this level load them concurrently
+                    self._cached_population_df(population=gate.parent)
+                    if isinstance(gate, BooleanGate):
+                        for pop in gate.populations:
+                            self._cached_population_df(population=pop)
+
+                concurrent = njobs > 1 and len(ready) > 1
+
+                def load(gate):
+                    if isinstance(gate, BooleanGate):
+                        data, parent_data = self._load_gate_dataframes_boolean(gate=gate)
+                        return data, parent_data, None
+                    data, ctrl_parent_data = self._load_gate_dataframes(gate=gate,
+                                                                        fda_norm=fda_norm,
+                                                                        verbose=verbose)
+                    return data, data, ctrl_parent_data
+
+                # Control estimation and normalisation stay on this thread, one Gate at a time
+                loaded = {}
+                if concurrent:
+                    loaded = {g.gate_name: load(g) for g in ready
+                              if fda_norm or (not isinstance(g, BooleanGate) and g.ctrl_x is not None)}
+
+                def fit(gate):
+                    data, parent_data, ctrl_parent_data = loaded.pop(gate.gate_name, None) or load(gate)
+                    populations = self._fit_gate(gate=gate,
+                                                 data=data,
+                                                 ctrl_parent_data=ctrl_parent_data,
+                                                 verbose=verbose and not concurrent,
+                                                 hyperparam_search=hyperparam_search)
+                    return populations, parent_data
+
+                if concurrent:
+                    with ThreadPool(min(njobs, len(ready))) as pool:
+                        results = pool.map(fit, ready)
+                else:
+                    results = [fit(g) for g in ready]
+                for gate, (populations, parent_data) in zip(ready, results):
+                    feedback(f"------ Applying {gate.gate_name} ------")
+                    for p in populations:
+                        self.filegroup.add_population(population=p)
+                    if verbose:
+                        gate_stats(gate=gate, parent_data=parent_data, populations=populations)
+                    feedback("----------------------------------------")
+                applied = {g.gate_name for g in ready}
+                gates_to_apply = [g for g in gates_to_apply if g.gate_name not in applied]
+                # Only keep cached populations that a remaining gate will load
+                required = {g.parent for g in gates_to_apply}
+                required.update(p for g in gates_to_apply if isinstance(g, BooleanGate) for p in g.populations)
+                self._population_df_cache = {k: v for k, v in self._population_df_cache.items()
+                                             if k in required}
+        finally:
+            self._population_df_cache = None
 
     def apply_to_experiment(self,
                             experiment: Experiment,
@@ -855,12 +968,13 @@ class GatingStrategy(mongoengine.Document):
         AssertionError
             One or more of the populations given in overlay is not downstream of the parent
         """
-        if parent not in self.list_populations():
+        populations = set(self.list_populations())
+        if parent not in populations:
             raise MissingPopulationError("Parent population does not exist")
-        if not all([x in self.list_populations() for x in overlay]):
+        if not populations.issuperset(overlay):
             raise MissingPopulationError("One or more given populations could not be found")
-        downstream = self.filegroup.list_downstream_populations(population=parent)
-        assert all([x in downstream for x in overlay]), \
+        downstream = set(self.filegroup.list_downstream_populations(population=parent))
+        assert downstream.issuperset(overlay), \
             "One or more of the given populations is not downstream of the given parent"
         create_plot_kwargs = create_plot_kwargs or {}
         plotting = FlowPlot(**create_plot_kwargs)
@@ -909,7 +1023,7 @@ class GatingStrategy(mongoengine.Document):
         MissingPopulationError
             Population is missing
         """
-        if population not in self.list_populations():
+        if population not in self.filegroup.tree:
             raise MissingPopulationError(f"{population} does not exist")
         data = self.filegroup.load_population_df(population=population,
                                                  transform=None,
@@ -976,7 +1090,7 @@ class GatingStrategy(mongoengine.Document):
         """
         gate = self.get_gate(gate=gate_name)
         err = "Cannot edit a gate that has not been applied; gate children not present in population tree."
-        assert all([x in self.filegroup.tree.keys() for x in [c.name for c in gate.children]]), err
+        assert all(c.name in self.filegroup.tree for c in gate.children), err
         transforms, transform_kwargs = gate.transform_info()
         parent = self.filegroup.load_population_df(population=gate.parent,
                                                    transform=transforms,
@@ -1029,7 +1143,8 @@ class GatingStrategy(mongoengine.Document):
         """
         Echos the downstream effects of an edited gate by iterating over the Population
         dependencies and reapplying their geometries to the modified data. Should be
-        called after 'edit_population'.
+        called after 'edit_population'. Dependencies are visited parents first, so the
+        (updated) data of a parent is loaded once and shared by all of its children.
 
         Parameters
         ----------
@@ -1040,13 +1155,17 @@ class GatingStrategy(mongoengine.Document):
         None
         """
         downstream_populations = self.filegroup.list_downstream_populations(population=population_name)
+        parents = {}
         for pop in downstream_populations:
             pop = self.filegroup.get_population(pop)
             transforms = {k: v for k, v in zip([pop.geom.x, pop.geom.y],
                                                [pop.geom.transform_x, pop.geom.transform_y])
                           if k is not None}
-            parent = self.filegroup.load_population_df(population=pop.parent,
-                                                       transform=transforms)
+            key = (pop.parent, tuple(transforms.items()))
+            if key not in parents:
+                parents[key] = self.filegroup.load_population_df(population=pop.parent,
+                                                                 transform=transforms)
+            parent = parents[key]
             if isinstance(pop.geom, ThresholdGeom):
                 self.filegroup.update_population(update_threshold(population=pop,
                                                                   parent_data=parent,
@@ -1065,7 +1184,7 @@ class GatingStrategy(mongoengine.Document):
              **kwargs):
         """
         Save GatingStrategy and the populations generated for the associated
-        FileGroup.
+        FileGroup. Only new or modified gates are saved (see cytopy.data.gate.Gate.modified).
 
         Parameters
         ----------
@@ -1082,7 +1201,9 @@ class GatingStrategy(mongoengine.Document):
         """
         if save_strategy:
             for g in self.gates:
-                g.save()
+                # Gates loaded from the database and left unmodified are not validated, serialised and written again
+                if g.modified:
+                    g.save()
             self.last_edit = datetime.now()
             super().save(*args, **kwargs)
         if save_filegroup:
@@ -1122,9 +1243,8 @@ class GatingStrategy(mongoengine.Document):
                 g.delete()
         if remove_associations:
             self.print("Deleting associated populations in FileGroups...")
-            for f in progress_bar(FileGroup.objects(), verbose=self.verbose):
-                if self.name in f.gating_strategy:
-                    f.gating_strategy = [gs for gs in f.gating_strategy if gs != self.name]
-                    f.delete_populations(populations=populations)
-                    f.save()
+            for f in progress_bar(FileGroup.objects(gating_strategy=self.name), verbose=self.verbose):
+                f.gating_strategy = [gs for gs in f.gating_strategy if gs != self.name]
+                f.delete_populations(populations=populations)
+                f.save()
         self.print(f"{self.name} successfully deleted.")
@@ -30,15 +30,26 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from ..flow import transform
 import numpy as np
 import pandas as pd
-from multiprocessing import Pool, cpu_count
 from warnings import warn
-from functools import partial
 from matplotlib.patches import Ellipse
+from matplotlib.path import Path
 from scipy import linalg, stats
 from scipy.spatial.qhull import ConvexHull, QhullError
-from shapely.geometry import Polygon, Point
+from shapely.geometry import Polygon
 import mongoengine
 
+try:
+    # Vectorised GEOS predicates; only available when shapely is built with its C speedups
+    from shapely.vectorized import contains as vectorized_contains
+except ImportError:
+    vectorized_contains = None
+
+try:
+    # Fuses element-wise expressions into a single multi-threaded pass; optional dependency of pandas
+    import numexpr
+except ImportError:
+    numexpr = None
+
 __author__ = "Ross Burton"
 __copyright__ = "Copyright 2020, cytopy"
 __credits__ = ["Ross Burton", "Simone Cuff", "Andreas Artemiou", "Matthias Eberl"]
@@ -127,45 +138,158 @@ class PolygonGeom(PopulationGeometry):
     x_values = mongoengine.ListField()
     y_values = mongoengine.ListField()
 
+    def __init__(self, *args, **kwargs):
+        # Shapely Polygon built from x_values and y_values and its bounding box, and the
+        # coordinates in linear space (see transform_to_linear); created on first access
+        self._shape = None
+        self._bounds = None
+        self._linear = None
+        super().__init__(*args, **kwargs)
+
+    def __setattr__(self, key, value):
+        if key in ("x_values", "y_values"):
+            super().__setattr__("_shape", None)
+            super().__setattr__("_bounds", None)
+        if key in ("x_values", "y_values", "transform_x", "transform_y", "transform_x_kwargs", "transform_y_kwargs"):
+            super().__setattr__("_linear", None)
+        super().__setattr__(key, value)
+
     @property
     def shape(self):
+        """
+        Shapely Polygon defined by x_values and y_values. The Polygon is built once and
+        cached; assigning new x_values or y_values clears the cache.
+
+        Returns
+        -------
+        Polygon
+        """
         assert self.x_values is not None and self.y_values is not None, \
             "x and y values not defined for this Polygon"
-        return create_polygon(self.x_values, self.y_values)
+        if self._shape is None:
+            self._shape = create_polygon(self.x_values, self.y_values)
+        return self._shape
+
+    @property
+    def bounds(self) -> tuple:
+        """
+        Bounding box of the Polygon as (minx, miny, maxx, maxy); empty if the Polygon
+        is empty. Cached alongside shape.
+
+        Returns
+        -------
+        tuple
+        """
+        if self._bounds is None:
+            self._bounds = self.shape.bounds
+        return self._bounds
 
     def transform_to_linear(self):
         """
         x,y coordinates are transformed to their equivalent value in linear space
         according to the transform defined. If transform is None, coordinates
-        are returned as saved.
+        are returned as saved. Transformed coordinates are computed once and cached
+        as read-only arrays; assigning new coordinates or transforms clears the cache.
 
         Returns
         -------
         numpy.ndarray, numpy.ndarray
         """
+        if self._linear is not None:
+            return self._linear
         x_values, y_values = self.x_values, self.y_values
         if self.transform_x:
             kwargs = self.transform_x_kwargs or {}
             transformer = transform.TRANSFORMERS.get(self.transform_x)(**kwargs)
             x_values = transformer.inverse_scale(pd.DataFrame({"x": self.x_values}), features=["x"])["x"].values
+            x_values.flags.writeable = False
         if self.transform_y:
             kwargs = self.transform_y_kwargs or {}
             transformer = transform.TRANSFORMERS.get(self.transform_y)(**kwargs)
             y_values = transformer.inverse_scale(pd.DataFrame({"y": self.y_values}), features=["y"])["y"].values
+            y_values.flags.writeable = False
+        if self.transform_x or self.transform_y:
+            self._linear = x_values, y_values
         return x_values, y_values
 
 
-def point_in_poly(coords: np.array,
-                  poly: Polygon):
-    point = Point(coords)
-    return poly.contains(point)
+def within_bounds(x: np.ndarray,
+                  y: np.ndarray,
+                  bounds: tuple) -> np.ndarray:
+    """
+    Test which of the given points fall within a rectangle. When numexpr is available the
+    four comparisons are fused into a single multi-threaded pass, otherwise they are written
+    into two reused boolean buffers rather than allocating a new array per comparison.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+    y: numpy.ndarray
+    bounds: tuple
+        (xmin, ymin, xmax, ymax) as returned by shapely geometry bounds
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask, True for points inside the rectangle (inclusive of the boundary)
+    """
+    xmin, ymin, xmax, ymax = bounds
+    if numexpr is not None:
+        return numexpr.evaluate("(x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)",
+                                local_dict=dict(x=x, y=y, xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax))
+    mask = np.greater_equal(x, xmin)
+    tmp = np.less_equal(x, xmax)
+    mask &= tmp
+    mask &= np.greater_equal(y, ymin, out=tmp)
+    mask &= np.less_equal(y, ymax, out=tmp)
+    return mask
+
+
+def polygon_contains(poly: Polygon,
+                     x: np.ndarray,
+                     y: np.ndarray) -> np.ndarray:
+    """
+    Test which of the given points fall within a shapely Polygon, accounting for any
+    holes (interior rings) of the Polygon. Points outside the bounding box of the
+    Polygon are rejected first (see within_bounds); the remaining candidates are
+    tested in a single call to GEOS using shapely.vectorized when available, otherwise
+    each ring is tested in a single compiled pass with matplotlib.path.Path.
+
+    Parameters
+    ----------
+    poly: shapely.geometry.Polygon
+    x: numpy.ndarray
+    y: numpy.ndarray
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask, True for points inside the polygon
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    inside = np.zeros(x.shape[0], dtype=bool)
+    if poly.is_empty:
+        return inside
+    candidates = np.flatnonzero(within_bounds(x, y, poly.bounds))
+    if candidates.size == 0:
+        return inside
+    cx, cy = x[candidates], y[candidates]
+    if vectorized_contains is not None:
+        inside[candidates] = np.asarray(vectorized_contains(poly, cx, cy), dtype=bool)
+        return inside
+    points = np.column_stack([cx, cy])
+    candidate_inside = np.zeros(candidates.shape[0], dtype=bool)
+    for ring in [poly.exterior, *poly.interiors]:
+        candidate_inside ^= Path(np.asarray(ring.coords), closed=True).contains_points(points)
+    inside[candidates] = candidate_inside
+    return inside
 
 
 def inside_polygon(df: pd.DataFrame,
                    x: str,
                    y: str,
                    poly: Polygon,
-                   njobs: int = -1):
+                   njobs: int or None = None):
     """
     Return rows in dataframe who's values for x and y are contained in some polygon coordinate shape
 
@@ -179,21 +303,20 @@ def inside_polygon(df: pd.DataFrame,
         name of y-axis plane
     poly: shapely.geometry.Polygon
         Polygon object to search
-    njobs: int
-        Number of jobs to run in parallel, by default uses all available cores
+    njobs: int, optional
+        Deprecated and ignored; all points are tested in a single vectorised pass
+        (see polygon_contains). Will be removed in a future release.
 
     Returns
     --------
     Pandas.DataFrame
         Masked DataFrame containing only those rows that fall within the Polygon
     """
-    if njobs < 0:
-        njobs = cpu_count()
-    xy = df[[x, y]].values
-    f = partial(point_in_poly, poly=poly)
-    with Pool(njobs) as pool:
-        mask = list(pool.map(f, xy))
-    return df.iloc[mask]
+    if njobs is not None:
+        warn("njobs is deprecated and ignored by inside_polygon; it will be removed in a future release",
+             DeprecationWarning)
+    mask = polygon_contains(poly=poly, x=df[x].values, y=df[y].values)
+    return df[mask]
 
 
 def polygon_overlap(poly1: Polygon,
@@ -214,17 +337,39 @@ def polygon_overlap(poly1: Polygon,
     -------
     float
     """
-    if poly1.intersects(poly2):
+    if bounds_intersect(poly1.bounds, poly2.bounds) and poly1.intersects(poly2):
         overlap = float(poly1.intersection(poly2).area / poly1.area)
         if overlap >= threshold:
             return overlap
     return 0.
 
 
+def bounds_intersect(bounds1: tuple,
+                     bounds2: tuple) -> bool:
+    """
+    Test if two bounding boxes, given as (minx, miny, maxx, maxy), intersect. Used to
+    reject non-overlapping geometries without an exact test; empty bounds never intersect.
+
+    Parameters
+    ----------
+    bounds1: tuple
+    bounds2: tuple
+
+    Returns
+    -------
+    bool
+    """
+    if len(bounds1) == 0 or len(bounds2) == 0:
+        return False
+    return (bounds1[0] <= bounds2[2] and bounds2[0] <= bounds1[2] and
+            bounds1[1] <= bounds2[3] and bounds2[1] <= bounds1[3])
+
+
 def create_polygon(x: list,
                    y: list):
     """
-    Given a list of x coordinated and a list of y coordinates, generate a shapely Polygon
+    Given a list of x coordinated and a list of y coordinates, generate a shapely Polygon.
+    Coordinates are passed to shapely as a single (N, 2) array rather than a list of tuples.
 
     Parameters
     ----------
@@ -235,14 +380,35 @@ def create_polygon(x: list,
     -------
     Polygon
     """
-    return Polygon([(x, y) for x, y in zip(x, y)])
+    if len(x) == 0:
+        return Polygon()
+    return Polygon(np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]))
+
+
+def polygon_vertices(poly: Polygon) -> (list, list):
+    """
+    Given a shapely Polygon, return the x and y coordinates of its exterior. Coordinates
+    are copied out of shapely once, as a single (N, 2) array.
+
+    Parameters
+    ----------
+    poly: Polygon
+
+    Returns
+    -------
+    list, list
+    """
+    coords = np.asarray(poly.exterior.coords)
+    if coords.size == 0:
+        return [], []
+    return coords[:, 0].tolist(), coords[:, 1].tolist()
 
 
 def inside_ellipse(data: np.array,
                    center: tuple,
                    width: int or float,
                    height: int or float,
-                   angle: int or float) -> object:
+                   angle: int or float) -> np.ndarray:
     """
     Return mask of two dimensional matrix specifying if a data point (row) falls
     within an ellipse
@@ -263,7 +429,7 @@ def inside_ellipse(data: np.array,
     Returns
     --------
     numpy.ndarray
-        numpy array of indices for values inside specified ellipse
+        Boolean mask (one value per row), True for points inside the ellipse
     """
     cos_angle = np.cos(np.radians(180. - angle))
     sin_angle = np.sin(np.radians(180. - angle))
@@ -278,17 +444,7 @@ def inside_ellipse(data: np.array,
     yct = xc * sin_angle + yc * cos_angle
 
     rad_cc = (xct ** 2 / (width / 2.) ** 2) + (yct ** 2 / (height / 2.) ** 2)
-
-    in_ellipse = []
-
-    for r in rad_cc:
-        if r <= 1.:
-            # point in ellipse
-            in_ellipse.append(True)
-        else:
-            # point not in ellipse
-            in_ellipse.append(False)
-    return in_ellipse
+    return rad_cc <= 1.
 
 
 def probablistic_ellipse(covariances: np.array,
@@ -332,11 +488,11 @@ def create_convex_hull(x_values: np.array,
     -------
     numpy.ndarray, numpy.ndarray
     """
-    xy = np.array([[i[0], i[1]] for i in zip(x_values, y_values)])
+    xy = np.column_stack([x_values, y_values]).astype(np.float64, copy=False)
     try:
         hull = ConvexHull(xy, incremental=True)
-        x = [float(i) for i in xy[hull.vertices, 0]]
-        y = [float(i) for i in xy[hull.vertices, 1]]
+        vertices = xy[hull.vertices]
+        x, y = vertices[:, 0].tolist(), vertices[:, 1].tolist()
     except QhullError:
         warn("ConvexHull generated QhullError; cannot generate geometry")
         x, y = [], []
@@ -27,14 +27,17 @@ TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-from .geometry import PopulationGeometry, ThresholdGeom, PolygonGeom
-from functools import reduce
+from .geometry import PopulationGeometry, ThresholdGeom, PolygonGeom, polygon_vertices, bounds_intersect
 from shapely.ops import unary_union
+from threading import RLock
 from typing import List
 import numpy as np
 import pandas as pd
 import mongoengine
 
+# Serialises reading deferred population indexes from disk (see Population.load_index)
+_INDEX_LOAD_LOCK = RLock()
+
 __author__ = "Ross Burton"
 __copyright__ = "Copyright 2020, cytopy"
 __credits__ = ["Ross Burton", "Simone Cuff", "Andreas Artemiou", "Matthias Eberl"]
@@ -44,6 +47,10 @@ __maintainer__ = "Ross Burton"
 __email__ = "burtonrj@cardiff.ac.uk"
 __status__ = "Production"
 
+# Fraction of the event range above which two indexes are merged through a boolean membership
+# mask rather than by sorting; at this density the mask is no larger than an int32 index of events
+MASK_MERGE_DENSITY = 0.125
+
 
 class Population(mongoengine.EmbeddedDocument):
     """
@@ -92,19 +99,127 @@ class Population(mongoengine.EmbeddedDocument):
     signature = mongoengine.DictField()
 
     def __init__(self, *args, **kwargs):
-        # If the Population existed previously, fetch the index
+        # If the Population existed previously, the index is read from disk on first access
         self._index = kwargs.pop("index", None)
+        self._index_loader = None
+        self._index_modified = self._index is not None
         super().__init__(*args, **kwargs)
 
     @property
     def index(self):
-        return self._index
+        return self.load_index()
 
     @index.setter
     def index(self, idx: np.array):
         assert isinstance(idx, np.ndarray), "idx should be type numpy.ndarray"
         self.n = len(idx)
-        self._index = np.array(idx)
+        self._index = np.asarray(idx)
+        self._index_modified = True
+        self._index_loader = None
+
+    @property
+    def index_loaded(self) -> bool:
+        """
+        False if the index of this population is still waiting to be read from disk
+        """
+        return self._index_loader is None
+
+    @property
+    def index_modified(self) -> bool:
+        """
+        True if the index of this population has been assigned since it was last read from,
+        or written to, disk (see mark_index_stored)
+        """
+        return self._index_modified
+
+    def mark_index_stored(self):
+        """
+        Flag the current index as identical to the index stored on disk, so that it is not
+        written again when the FileGroup is saved
+
+        Returns
+        -------
+        None
+        """
+        self._index_modified = False
+
+    def load_index(self, **kwargs) -> np.ndarray or None:
+        """
+        Return the index of this population, first reading it from disk if it was deferred
+        (see defer_index). The read is guarded by a lock and the loader is only discarded once
+        the read has succeeded, so concurrent callers (e.g. the threads of
+        GatingStrategy.apply_all) never observe a loaded population without its index.
+
+        Parameters
+        ----------
+        kwargs:
+            Additional keyword arguments passed to the deferred loader (e.g. an open HDF5 file handle)
+
+        Returns
+        -------
+        numpy.ndarray or None
+        """
+        if self._index_loader is not None:
+            with _INDEX_LOAD_LOCK:
+                if self._index_loader is not None:
+                    self._index = self._index_loader(**kwargs)
+                    self._index_modified = False
+                    self._index_loader = None
+        return self._index
+
+    def defer_index(self, loader: callable):
+        """
+        Defer reading the index of this population until it is first accessed. The
+        population metadata (e.g. n, prop_of_parent and prop_of_total) remains available
+        without triggering the read.
+
+        Parameters
+        ----------
+        loader: callable
+            Function that returns the population index; called without arguments on first
+            access of index, or with the keyword arguments given to load_index
+
+        Returns
+        -------
+        None
+        """
+        self._index_loader = loader
+
+
+def create_signature(data: pd.DataFrame,
+                     idx: np.ndarray or None = None,
+                     summary_method: callable or None = None) -> dict:
+    """
+    Generate the signature of a population; the average of each numerical column in the
+    given data. Rows are selected first, so the cost scales with the size of the population
+    rather than of the data it is drawn from, and the summary is computed as a single
+    reduction over the underlying array rather than column by column; non-numerical
+    columns are ignored.
+
+    Parameters
+    ----------
+    data: Pandas.DataFrame
+    idx: numpy.ndarray, optional
+        Positional index of the rows to summarise. If not given, all rows are used.
+    summary_method: callable, optional
+        Function applied to each column (e.g. numpy.median). Defaults to the mean.
+
+    Returns
+    -------
+    dict
+        {column name: summary value}
+    """
+    if idx is not None:
+        data = data.iloc[idx]
+    columns = data.select_dtypes(include=np.number).columns
+    values = data.values if len(columns) == data.shape[1] else data[columns].values
+    if values.shape[0] == 0:
+        return {c: np.nan for c in columns}
+    if summary_method is None:
+        summary = np.mean(values, axis=0)
+    else:
+        summary = np.apply_along_axis(summary_method, 0, values)
+    return {c: float(v) for c, v in zip(columns, summary)}
 
 
 def _check_overlap(left: Population,
@@ -132,7 +247,8 @@ def _check_overlap(left: Population,
     """
     assert all(
         [isinstance(x.geom, PolygonGeom) for x in [left, right]]), "Only Polygon geometries can be checked for overlap"
-    overlap = left.geom.shape.intersects(right.geom.shape)
+    overlap = (bounds_intersect(left.geom.bounds, right.geom.bounds) and
+               left.geom.shape.intersects(right.geom.shape))
     if error:
         assert overlap, "Invalid: non-overlapping populations"
     return overlap
@@ -165,10 +281,101 @@ def _check_transforms_dimensions(left: Population,
     assert left.geom.y == right.geom.y, "Y dimension differs between left and right populations"
 
 
+def _is_sorted(x: np.ndarray) -> bool:
+    """
+    Test if a one dimensional array is sorted in ascending order.
+
+    Parameters
+    ----------
+    x: numpy.ndarray
+
+    Returns
+    -------
+    bool
+    """
+    return x.size < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+
+def _sorted_union(arrays: List[np.ndarray],
+                  presorted: bool = True) -> np.ndarray:
+    """
+    Union of a list of arrays, returned sorted in ascending order. The arrays are concatenated
+    into a single buffer and sorted in place, then consecutive duplicates are dropped in a
+    single pass. If every array is already sorted (presorted=True) a stable sort (timsort for
+    integer arrays) is used, which detects the pre-sorted runs and merges them rather than
+    sorting from scratch; otherwise the default quicksort is used. Unlike numpy.union1d or
+    numpy.unique, the input is sorted only once and no further copies are made.
+
+    Parameters
+    ----------
+    arrays: list
+        List of one dimensional numpy.ndarray
+    presorted: bool (default=True)
+        Every array is sorted in ascending order
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    merged = np.concatenate(arrays)
+    if merged.size == 0:
+        return merged
+    merged.sort(kind="stable" if presorted else "quicksort")
+    keep = np.empty(merged.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
+
+
+def _union_indexes(indexes: List[np.ndarray]) -> np.ndarray:
+    """
+    Union of the indexes of many populations, sorted in ascending order (see _sorted_union).
+
+    Parameters
+    ----------
+    indexes: list
+        List of population indexes
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    indexes = [np.asarray(x) for x in indexes]
+    return _sorted_union(indexes, presorted=all(_is_sorted(x) for x in indexes))
+
+
+def _mask_union(left: np.ndarray,
+                right: np.ndarray,
+                size: int) -> np.ndarray:
+    """
+    Union of two arrays of non-negative event indexes via a boolean membership mask over
+    the range [0, size). Setting and reading the mask are single vectorised passes, so no
+    sorting is required; the result is sorted in ascending order.
+
+    Parameters
+    ----------
+    left: numpy.ndarray
+    right: numpy.ndarray
+    size: int
+        Length of the mask (one greater than the largest index)
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    mask = np.zeros(size, dtype=bool)
+    mask[left] = True
+    mask[right] = True
+    return np.flatnonzero(mask)
+
+
 def _merge_index(left: Population,
                  right: Population) -> np.ndarray:
     """
-    Merge the index of two populations.
+    Merge the index of two populations. When the populations are dense relative to the
+    range of events they span (see MASK_MERGE_DENSITY) the union is taken through a boolean
+    membership mask. Otherwise, population indexes are typically sorted, in which case a
+    linear time merge is used, falling back to a single sort of the concatenated indexes.
 
     Parameters
     ----------
@@ -179,7 +386,12 @@ def _merge_index(left: Population,
     -------
     numpy.ndarray
     """
-    return np.unique(np.concatenate([left.index, right.index], axis=0), axis=0)
+    left_idx, right_idx = np.asarray(left.index), np.asarray(right.index)
+    if left_idx.size > 0 and right_idx.size > 0 and min(left_idx.min(), right_idx.min()) >= 0:
+        size = int(max(left_idx.max(), right_idx.max())) + 1
+        if left_idx.size + right_idx.size > size * MASK_MERGE_DENSITY:
+            return _mask_union(left_idx, right_idx, size)
+    return _union_indexes([left_idx, right_idx])
 
 
 def _merge_signatures(left: Population,
@@ -196,7 +408,25 @@ def _merge_signatures(left: Population,
     -------
     dict
     """
-    return pd.DataFrame([left.signature, right.signature]).mean().to_dict()
+    return _mean_signatures([left.signature, right.signature])
+
+
+def _mean_signatures(signatures: List[dict]) -> dict:
+    """
+    Average a list of signatures, channel by channel. Channels missing from a signature
+    are ignored when calculating the mean for that channel.
+
+    Parameters
+    ----------
+    signatures: list
+        List of dictionaries {channel: value}
+
+    Returns
+    -------
+    dict
+    """
+    channels = dict.fromkeys(k for sig in signatures for k in sig.keys())
+    return {k: float(np.mean([sig[k] for sig in signatures if k in sig])) for k in channels}
 
 
 def _merge_thresholds(left: Population,
@@ -233,12 +463,12 @@ def _merge_thresholds(left: Population,
                              transform_y=left.geom.transform_y,
                              x_threshold=left.geom.x_threshold,
                              y_threshold=left.geom.y_threshold)
-
+    new_idx = _merge_index(left, right)
     new_population = Population(population_name=new_population_name,
-                                n=len(left.index) + len(right.index),
+                                n=new_idx.size,
                                 parent=left.parent,
-                                warnings=left.warnings + right.warnings + ["MERGED POPULATION"],
-                                index=_merge_index(left, right),
+                                warnings=[*left.warnings, *right.warnings, "MERGED POPULATION"],
+                                index=new_idx,
                                 geom=new_geom,
                                 source="gate",
                                 definition=",".join([left.definition, right.definition]),
@@ -263,8 +493,8 @@ def _merge_polygons(left: Population,
     Population
     """
     _check_overlap(left, right)
-    new_shape = unary_union([p.geom.shape for p in [left, right]])
-    x, y = new_shape.exterior.coords.xy
+    new_shape = left.geom.shape.union(right.geom.shape)
+    x, y = polygon_vertices(new_shape)
     new_geom = PolygonGeom(x=left.geom.x,
                            y=left.geom.y,
                            transform_x=left.geom.transform_x,
@@ -273,9 +503,9 @@ def _merge_polygons(left: Population,
                            y_values=y)
     new_idx = _merge_index(left, right)
     new_population = Population(population_name=new_population_name,
-                                n=len(new_idx),
+                                n=new_idx.size,
                                 parent=left.parent,
-                                warnings=left.warnings + right.warnings + ["MERGED POPULATION"],
+                                warnings=[*left.warnings, *right.warnings, "MERGED POPULATION"],
                                 index=new_idx,
                                 source="gate",
                                 geom=new_geom,
@@ -308,18 +538,45 @@ def merge_non_geom_populations(populations: list,
     assert all([x.source == "cluster" or x.source == "classifier" for x in populations]), err
     assert len(set([x.parent for x in populations])) == 1, "Populations for merging should share the same parent"
     assert len(populations) > 1, "Provide two or more populations for merging"
-    new_idx = np.unique(np.concatenate([x.index for x in populations], axis=0), axis=0)
-    warnings = [i for sl in [x.warnings for x in populations] for i in sl] + ["MERGED POPULATIONS"]
+    new_idx = _union_indexes([x.index for x in populations])
+    warnings = [*(i for x in populations for i in x.warnings), "MERGED POPULATIONS"]
     new_population = Population(population_name=new_population_name,
-                                n=len(new_idx),
+                                n=new_idx.size,
                                 parent=populations[0].parent,
                                 warnings=warnings,
                                 index=new_idx,
                                 source=populations[0].source,
-                                signature=pd.DataFrame([x.signature for x in populations]).mean().to_dict())
+                                signature=_mean_signatures([x.signature for x in populations]))
     return new_population
 
 
+def _check_gate_merge(left: Population,
+                      right: Population):
+    """
+    Given two Populations, checks that they can be merged; they must share the same parent,
+    source, geometry type and transformations. Raises assertion error if not.
+
+    Parameters
+    ----------
+    left: Population
+    right: Population
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    AssertionError
+        If populations are incompatible
+    """
+    _check_transforms_dimensions(left, right)
+    assert left.parent == right.parent, "Parent populations do not match"
+    assert left.source == right.source, "Populations must be from the same source"
+    assert isinstance(left.geom, type(
+        right.geom)), f"Geometries must be of the same type; left={type(left.geom)}, right={type(right.geom)}"
+
+
 def merge_gate_populations(left: Population,
                            right: Population,
                            new_population_name: str or None = None):
@@ -342,12 +599,8 @@ def merge_gate_populations(left: Population,
     AssertionError
         Invalid populations provided
     """
-    _check_transforms_dimensions(left, right)
+    _check_gate_merge(left, right)
     new_population_name = new_population_name or f"merge_{left.population_name}_{right.population_name}"
-    assert left.parent == right.parent, "Parent populations do not match"
-    assert left.source == right.source, "Populations must be from the same source"
-    assert isinstance(left.geom, type(
-        right.geom)), f"Geometries must be of the same type; left={type(left.geom)}, right={type(right.geom)}"
     if isinstance(left.geom, ThresholdGeom):
         return _merge_thresholds(left, right, new_population_name)
     return _merge_polygons(left, right, new_population_name)
@@ -357,7 +610,8 @@ def merge_multiple_gate_populations(populations: List[Population],
                                     new_population_name: str or None = None):
     """
     Merge multiple Population's. The indexes and signatures of these populations will be merged.
-    The populations must have the same geometries.
+    The populations must have the same geometries. All populations are merged in a single pass
+    (one index union and, for polygon geometries, one polygon union) rather than pairwise.
 
     Parameters
     ----------
@@ -377,6 +631,46 @@ def merge_multiple_gate_populations(populations: List[Population],
         assert len(set([p.population_name for p in populations])) == 1, \
             "If a new population name is not given the populations are expected to have the same population name"
     new_population_name = new_population_name or populations[0].population_name
-    merged_pop = reduce(lambda p1, p2: merge_gate_populations(p1, p2), populations)
-    merged_pop.population_name = new_population_name
-    return merged_pop
+    if len(populations) == 1:
+        populations[0].population_name = new_population_name
+        return populations[0]
+    first = populations[0]
+    for p in populations[1:]:
+        _check_gate_merge(first, p)
+    if isinstance(first.geom, ThresholdGeom):
+        assert len(set([p.geom.x_threshold for p in populations])) == 1, \
+            "Threshold merge assumes that the populations are derived " \
+            "from the same gate; X threshold should match between populations"
+        assert len(set([p.geom.y_threshold for p in populations])) == 1, \
+            "Threshold merge assumes that the populations are derived " \
+            "from the same gate; Y threshold should match between populations"
+        new_geom = ThresholdGeom(x=first.geom.x,
+                                 y=first.geom.y,
+                                 transform_x=first.geom.transform_x,
+                                 transform_y=first.geom.transform_y,
+                                 x_threshold=first.geom.x_threshold,
+                                 y_threshold=first.geom.y_threshold)
+        definition = ",".join([p.definition for p in populations])
+    else:
+        assert all([isinstance(p.geom, PolygonGeom) for p in populations]), \
+            "Only Polygon geometries can be checked for overlap"
+        new_shape = unary_union([p.geom.shape for p in populations])
+        assert new_shape.geom_type == "Polygon", "Invalid: non-overlapping populations"
+        x, y = polygon_vertices(new_shape)
+        new_geom = PolygonGeom(x=first.geom.x,
+                               y=first.geom.y,
+                               transform_x=first.geom.transform_x,
+                               transform_y=first.geom.transform_y,
+                               x_values=x,
+                               y_values=y)
+        definition = None
+    new_idx = _union_indexes([p.index for p in populations])
+    return Population(population_name=new_population_name,
+                      n=len(new_idx),
+                      parent=first.parent,
+                      warnings=[*(w for p in populations for w in p.warnings), "MERGED POPULATION"],
+                      index=new_idx,
+                      geom=new_geom,
+                      source="gate",
+                      definition=definition,
+                      signature=_mean_signatures([p.signature for p in populations]))
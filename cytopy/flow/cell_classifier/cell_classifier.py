@@ -635,7 +635,7 @@ class CellClassifier:
             If target populations are missing in validation data
         """
         val = experiment.get_sample(validation_id)
-        assert all([x in val.tree.keys() for x in self.target_populations]), \
+        assert set(self.target_populations).issubset(val.tree.keys()), \
             f"Validation sample should contain the following populations: {self.target_populations}"
         if self.multi_label:
             x, y = utils.multilabel(ref=val,
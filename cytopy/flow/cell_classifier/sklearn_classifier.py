@@ -390,13 +390,17 @@ class SklearnCellClassifier(CellClassifier):
         path: str
             Where to save on disk
         kwargs:
-            Additional keyword arguments passed to pickle.dump call
+            Additional keyword arguments passed to pickle.dump call; by default the
+            highest available pickle protocol is used, which writes the NumPy arrays
+            of fitted models as raw buffers
 
         Returns
         -------
         None
         """
-        pickle.dump(self.model, open(path, "wb"), **kwargs)
+        kwargs["protocol"] = kwargs.get("protocol", pickle.HIGHEST_PROTOCOL)
+        with open(path, "wb") as f:
+            pickle.dump(self.model, f, **kwargs)
 
     def load_model(self, path: str, **kwargs):
         """
@@ -415,5 +419,6 @@ class SklearnCellClassifier(CellClassifier):
         -------
         None
         """
-        self.model = pickle.load(open(path, "rb"), **kwargs)
+        with open(path, "rb") as f:
+            self.model = pickle.load(f, **kwargs)
 
@@ -2,10 +2,30 @@ from sklearn.utils.class_weight import compute_class_weight
 from sklearn import metrics as skmetrics
 import matplotlib.pyplot as plt
 import pandas as pd
+from functools import lru_cache
 import numpy as np
 import inspect
 
 
+@lru_cache(maxsize=None)
+def _metric_parameters(metric: str) -> frozenset:
+    """
+    Names of the parameters of a Scikit-Learn metric function. Signatures are inspected
+    once per metric and cached, as inspect.signature is slow relative to the metrics
+    themselves when these are computed repeatedly (e.g. across cross-validation folds).
+
+    Parameters
+    ----------
+    metric: str
+        Name of a function in sklearn.metrics
+
+    Returns
+    -------
+    frozenset
+    """
+    return frozenset(inspect.signature(getattr(skmetrics, metric)).parameters.keys())
+
+
 def calc_metrics(metrics: list,
                  y_true: np.array,
                  y_pred: np.array or None = None,
@@ -74,12 +94,13 @@ def calc_metrics(metrics: list,
                            average="macro")
         else:
             f = getattr(skmetrics, m)
-            if "y_score" in inspect.signature(f).parameters.keys():
+            parameters = _metric_parameters(m)
+            if "y_score" in parameters:
                 if y_score is None:
                     raise AttributeError(f"Metric requested ({m}) requires probabilities of positive class but "
                                          f"y_score not provided; y_score is None.")
                 results[m] = f(y_true=y_true, y_score=y_score)
-            elif "y_pred" in inspect.signature(f).parameters.keys():
+            elif "y_pred" in parameters:
                 results[m] = f(y_true=y_true, y_pred=y_pred)
             else:
                 raise ValueError("Unexpected metric. Signature should contain either 'y_score' or 'y_pred'")
@@ -186,7 +207,7 @@ def check_downstream_populations(ref,
         One or more populations not downstream of root
     """
     downstream = ref.list_downstream_populations(root_population)
-    assert all([x in downstream for x in population_labels]), \
+    assert set(population_labels).issubset(downstream), \
         "The first population in population_labels should be the 'root' population, with all further populations " \
         "being downstream from this 'root'. The given population_labels has one or more populations that is not " \
         "downstream from the given root."
@@ -46,7 +46,7 @@ SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 from ...data.experiment import Experiment, load_population_data_from_experiment
-from ...data.population import Population
+from ...data.population import Population, create_signature
 from ...data.subject import Subject
 from ...feedback import vprint, progress_bar
 from ..dim_reduction import dimensionality_reduction
@@ -879,23 +879,26 @@ class Clustering:
         -------
         None
         """
-        self.data[variable] = None
-        for _id in progress_bar(self.data.subject_id.unique(),
-                                verbose=verbose):
-            if _id is None:
-                continue
-            p = Subject.objects(subject_id=_id).get()
+        subject_ids = [_id for _id in self.data.subject_id.unique() if _id is not None]
+        # Fetch all subjects in a single query rather than one query per subject
+        subjects = {s.subject_id: s for s in Subject.objects(subject_id__in=subject_ids)}
+        values = {}
+        for _id in progress_bar(subject_ids, verbose=verbose):
+            if _id not in subjects:
+                raise Subject.DoesNotExist(f"Subject {_id} does not exist")
+            p = subjects[_id]
             try:
                 if embedded is not None:
                     x = None
                     for key in embedded:
                         x = p[key]
-                    self.data.loc[self.data.subject_id == _id, variable] = x[variable]
+                    values[_id] = x[variable]
                 else:
-                    self.data.loc[self.data.subject_id == _id, variable] = p[variable]
+                    values[_id] = p[variable]
             except KeyError:
                 warn(f'{_id} is missing meta-variable {variable}')
-                self.data.loc[self.data.subject_id == _id, variable] = None
+                values[_id] = None
+        self.data[variable] = [values.get(_id) for _id in self.data.subject_id.values]
 
     def plot_sample_clusters(self,
                              sample_id: str,
@@ -1043,17 +1046,18 @@ class Clustering:
             assert not self.data.meta_label.isnull().all(), "Meta clustering has not been performed"
         for sample_id in progress_bar(self.data.sample_id.unique(), verbose=verbose):
             fg = self.experiment.get_sample(sample_id)
-            sample_data = self.data[self.data.sample_id == sample_id].copy()
-            for cluster_label, cluster in sample_data.groupby(population_var):
+            sample_data = self.data[self.data.sample_id == sample_id]
+            original_index = sample_data.original_index.values
+            for cluster_label, idx in sample_data.groupby(population_var).indices.items():
                 population_name = str(cluster_label)
                 if self.population_prefix is not None:
                     population_name = f"{self.population_prefix}_{cluster_label}"
                 pop = Population(population_name=population_name,
-                                 n=cluster.shape[0],
+                                 n=len(idx),
                                  parent=self.root_population,
                                  source="cluster",
-                                 signature=cluster.mean().to_dict())
-                pop.index = cluster.original_index.values
+                                 signature=create_signature(sample_data, idx=idx))
+                pop.index = original_index[idx]
                 fg.add_population(population=pop)
             fg.save()
 
@@ -346,9 +346,8 @@ class LandmarkReg:
                  **kwargs):
         y1, y2, x = estimate_pdfs(target, ref, var)
         landmarks = [peaks(y, x, mph=mpt * y.max(), **kwargs) for y in [y1, y2]]
-        plabels = np.concatenate([[0 for i in range(len(landmarks[0]))],
-                                  [1 for i in range(len(landmarks[1]))]])
-        landmarks = np.array([x for sl in landmarks for x in sl])
+        plabels = np.repeat([0, 1], [len(landmarks[0]), len(landmarks[1])])
+        landmarks = np.concatenate(landmarks)
         self.landmarks = match_landmarks(landmarks, plabels)
         self.original_functions = FDataGrid([y1, y2], grid_points=x)
         self.warping_function = None
@@ -175,7 +175,7 @@ class FeatureSpace:
         self
         """
         for f in self._fcs_files:
-            if pop1 not in f.list_populations():
+            if pop1 not in f.tree:
                 self.logger.warning(f"{f.primary_id} missing population {pop1}")
                 if pop2 is None:
                     for p in [q for q in self.populations if q != pop1]:
@@ -186,7 +186,7 @@ class FeatureSpace:
                 p1n = self.population_statistics[f.primary_id][pop1]["n"]
                 if pop2 is None:
                     for p in [q for q in self.populations if q != pop1]:
-                        if p in f.list_populations():
+                        if p in f.tree:
                             pn = self.population_statistics[f.primary_id][p]["n"]
                             self.ratios[f.primary_id][f"{pop1}:{p}"] = p1n / pn
                         else:
@@ -243,7 +243,7 @@ class FeatureSpace:
         assert all([x in STATS.keys() for x in stats]), f"Invalid stats; valid stats are: {STATS.keys()}"
         for f in progress_bar(self._fcs_files, verbose=verbose):
             for p in populations:
-                if p not in f.list_populations():
+                if p not in f.tree:
                     self.logger.warning(f"{f.primary_id} missing population {p}")
                     for s in stats:
                         self.channel_desc[f.primary_id][f"{p}_{channel}_{s}"] = None
@@ -88,8 +88,8 @@ def create_ref_sample(experiment: Experiment,
     sampling_kwargs = sampling_kwargs or {}
     sample_ids = sample_ids or experiment.list_samples()
     new_file_name = new_file_name or f'{experiment.experiment_id}_sampled_data'
-    assert all([s in experiment.list_samples() for s in sample_ids]), \
-        'One or more samples specified do not belong to experiment'
+    missing = set(sample_ids).difference(experiment.list_samples())
+    assert not missing, f'One or more samples specified do not belong to experiment: {missing}'
     data = load_and_sample(experiment=experiment,
                            population=root_population,
                            sample_size=sample_size,
@@ -85,6 +85,42 @@ def uniform_downsampling(data: pd.DataFrame,
     raise TypeError("sample_size should be an int or float value")
 
 
+def uniform_sample_index(n: int,
+                         sample_size: int or float) -> np.ndarray:
+    """
+    Uniform downsampling of row positions; equivalent to uniform_downsampling but
+    for data that has not yet been loaded, so that only the sampled rows need to be
+    read. Positions are returned in ascending order.
+
+    Parameters
+    ----------
+    n: int
+        Number of observations to sample from
+    sample_size: int or float
+        Size of sample required. If a float is given will return a sample
+        of this proportion.
+
+    Returns
+    -------
+    Numpy.Array
+
+    Raises
+    ------
+    TypeError
+        Sample size type is invalid; should be either int or float
+    """
+    if isinstance(sample_size, int):
+        if sample_size >= n:
+            warn(f"Number of observations larger than requested sample size {sample_size}, "
+                 f"returning complete data (n={n})")
+            return np.arange(n)
+    elif isinstance(sample_size, float):
+        sample_size = int(round(sample_size * n))
+    else:
+        raise TypeError("sample_size should be an int or float value")
+    return np.sort(np.random.choice(n, size=sample_size, replace=False))
+
+
 def faithful_downsampling(data: np.array,
                           h: float):
     """
@@ -365,7 +401,10 @@ def upsample_knn(sample: pd.DataFrame,
     neighbours model to the sampled data and predict the assignment of labels in the original data.
     Uses sklearn.neighbors.KNeighborsClassifier for KNN implementation. If n_neighbors parameter
     is not provided, will estimate using grid search cross validation. The scoring parameter
-    can be tuned by changing the `scoring` input (default="balanced_accuracy")
+    can be tuned by changing the `scoring` input (default="balanced_accuracy"). Unless specified
+    otherwise in kwargs, the final model uses a KD tree (features are typically the one or two
+    dimensions of a gate, where a KD tree outperforms a ball tree) and predicts the labels of the
+    original data using all available cores.
 
     Parameters
     ----------
@@ -391,7 +430,7 @@ def upsample_knn(sample: pd.DataFrame,
     """
     feedback = vprint(verbose)
     feedback("Upsampling...")
-    n = kwargs.get("n_neighbors", None)
+    n = kwargs.pop("n_neighbors", None)
     if n is None:
         feedback("Calculating optimal n_neighbours by grid search CV...")
         n, score = calculate_optimal_neighbours(x=sample[features].values,
@@ -400,6 +439,7 @@ def upsample_knn(sample: pd.DataFrame,
                                                 **kwargs)
         feedback(f"Continuing with n={n}; chosen with balanced accuracy of {round(score, 3)}...")
     feedback("Training...")
+    model_kwargs = {"algorithm": "kd_tree", "n_jobs": -1, **kwargs}
     train_acc, val_acc, model = knn(data=sample,
                                     features=features,
                                     labels=np.array(labels),
@@ -407,7 +447,7 @@ def upsample_knn(sample: pd.DataFrame,
                                     holdout_size=0.2,
                                     random_state=42,
                                     return_model=True,
-                                    **kwargs)
+                                    **model_kwargs)
     feedback(f"...training balanced accuracy score: {train_acc}")
     feedback(f"...validation balanced accuracy score: {val_acc}")
     feedback("Predicting labels in original data...")
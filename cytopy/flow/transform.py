@@ -49,10 +49,12 @@ class TransformError(Exception):
     pass
 
 
-def _get_dataframe_column_index(data: pd.DataFrame,
-                                features: list):
+def _result_dtypes(data: pd.DataFrame,
+                   features: list) -> dict:
     """
-    Given the features of interest (columns in data) return the index of these features
+    Data types of the columns of the given dataframe after transforming the features of
+    interest; transformed features are floating point (single precision features are kept
+    in single precision) and all other columns keep their data type
 
     Parameters
     ----------
@@ -61,10 +63,14 @@ def _get_dataframe_column_index(data: pd.DataFrame,
 
     Returns
     -------
-    numpy.ndarray
-        Index of columns of interest
+    dict
+        Column name to data type
     """
-    return np.array([data.columns.get_loc(f) for f in features if f in data.columns])
+    dtypes = data.dtypes.to_dict()
+    for f in features:
+        if f in dtypes:
+            dtypes[f] = np.float32 if dtypes[f] == np.float32 else float
+    return dtypes
 
 
 class Transformer:
@@ -95,6 +101,49 @@ class Transformer:
         self.inverse = inverse_function
         self.kwargs = kwargs or {}
 
+    def _apply(self,
+               func: callable,
+               data: pd.DataFrame,
+               features: list) -> pd.DataFrame:
+        """
+        Apply a FlowUtils transform function (or its inverse) to the given features of
+        a copy of the dataframe. Only the values of the chosen features are passed to the
+        transform function, so the cost is independent of the number of other columns.
+        Transformed features are returned as float64, except single precision (float32)
+        features which remain float32; all other columns keep their data type
+        (see _result_dtypes). Features absent from the dataframe are ignored.
+
+        Parameters
+        ----------
+        func: callable
+        data: Pandas.DataFrame
+        features: list or str
+            Features to transform; a single feature may be given as a string
+
+        Returns
+        -------
+        Pandas.DataFrame
+
+        Raises
+        ------
+        TransformError
+            Transform function is missing the arguments channel_indices or channels
+        """
+        features = [features] if isinstance(features, str) else list(features)
+        features = [f for f in features if f in data.columns]
+        dtypes = _result_dtypes(data, features)
+        data = data.copy()
+        values = data[features].values.astype(float)
+        idx = np.arange(values.shape[1])
+        if "channel_indices" in func.__code__.co_varnames:
+            values = func(data=values, channel_indices=idx, **self.kwargs)
+        elif "channels" in func.__code__.co_varnames:
+            values = func(data=values, channels=idx, **self.kwargs)
+        else:
+            raise TransformError("Invalid transform function, missing argument 'channel_indices' or 'channels'")
+        data[features] = values
+        return data.astype(dtypes, copy=False)
+
     def scale(self,
               data: pd.DataFrame,
               features: list):
@@ -116,26 +165,7 @@ class Transformer:
             Chosen transform function is missing the arguments channel_indices or channels. cytopy uses
             the FlowUtils class for transformations. See FlowUtils documentation for details.
         """
-        data = data.copy()
-        original_index = data.index.values
-        data[features] = data[features].astype(float)
-        idx = _get_dataframe_column_index(data, features)
-        if "channel_indices" in self.transform.__code__.co_varnames:
-            data = pd.DataFrame(self.transform(data=data.values,
-                                               channel_indices=idx,
-                                               **self.kwargs),
-                                columns=data.columns,
-                                index=original_index)
-        elif "channels" in self.transform.__code__.co_varnames:
-            data = pd.DataFrame(self.transform(data=data.values,
-                                               channels=idx,
-                                               **self.kwargs),
-                                columns=data.columns,
-                                index=original_index)
-        else:
-            raise TransformError("Invalid transform function, missing argument 'channel_indices' or 'channels'")
-        data[features] = data[features].astype(float)
-        return data
+        return self._apply(func=self.transform, data=data, features=features)
 
     def inverse_scale(self,
                       data: pd.DataFrame,
@@ -159,26 +189,7 @@ class Transformer:
             Chosen inverse transform function is missing the arguments channel_indices or channels.
             cytopy uses the FlowUtils class for transformations. See FlowUtils documentation for details.
         """
-        data = data.copy()
-        original_index = data.index.values
-        data[features] = data[features].astype(float)
-        idx = _get_dataframe_column_index(data, features)
-        if "channel_indices" in self.inverse.__code__.co_varnames:
-            data = pd.DataFrame(self.inverse(data=data.values,
-                                             channel_indices=idx,
-                                             **self.kwargs),
-                                columns=data.columns,
-                                index=original_index)
-        elif "channels" in self.inverse.__code__.co_varnames:
-            data = pd.DataFrame(self.inverse(data=data.values,
-                                             channels=idx,
-                                             **self.kwargs),
-                                columns=data.columns,
-                                index=original_index)
-        else:
-            raise TransformError("Invalid inverse transform function, missing argument 'channel_indices' or 'channels'")
-        data[features] = data[features].astype(float)
-        return data
+        return self._apply(func=self.inverse, data=data, features=features)
 
 
 class LogicleTransformer(Transformer):
@@ -635,6 +646,8 @@ def apply_transform_map(data: pd.DataFrame,
     """
     Wrapper function to cytopy.flow.transform.apply_transform; takes a dictionary (feature_method) where
     each key is the name of a feature and the value the transform to be applied to that feature.
+    Features sharing the same transform and keyword arguments are transformed together, and only
+    the transformed columns (not the whole DataFrame) are passed to apply_transform.
 
     Parameters
     ----------
@@ -650,13 +663,23 @@ def apply_transform_map(data: pd.DataFrame,
     """
     data = data.copy()
     kwargs = kwargs or {}
+    groups = []
     for feature, method in feature_method.items():
         transform_kwargs = kwargs.get(feature, {})
-        data = apply_transform(data=data,
-                               features=[feature],
-                               method=method,
-                               return_transformer=False,
-                               **transform_kwargs)
+        for group_method, group_kwargs, features in groups:
+            if group_method == method and group_kwargs == transform_kwargs:
+                features.append(feature)
+                break
+        else:
+            groups.append((method, transform_kwargs, [feature]))
+    for method, transform_kwargs, features in groups:
+        transformed = apply_transform(data=data[features],
+                                      features=features,
+                                      method=method,
+                                      return_transformer=False,
+                                      **transform_kwargs)
+        for f in features:
+            data[f] = transformed[f].values
     return data
 
 
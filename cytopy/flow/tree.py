@@ -118,7 +118,7 @@ def construct_tree(populations: List[Population]) -> Dict[str, anytree.Node]:
         Root population is missing
     """
     err = "Invalid FileGroup, must contain 'root' population"
-    assert "root" in [p.population_name for p in populations], err
+    assert any(p.population_name == "root" for p in populations), err
     tree = {"root": anytree.Node(name="root", parent=None)}
     database_populations = [p for p in populations if p.population_name != 'root']
     return _grow_tree(tree=tree, database_populations=database_populations)
@@ -375,7 +375,7 @@ def dim_reduction_grid(data: pd.DataFrame,
     fig = plt.figure(figsize=figsize)
     nrows = math.ceil(len(comparison_samples) / 3)
     reference_df = data[data.sample_id == reference].copy()
-    if not all([f in reference_df.columns for f in features]):
+    if not set(features).issubset(reference_df.columns):
         raise ValueError(f'Invalid features; valid are: {reference_df.columns}')
     reference_df, reducer = dimensionality_reduction(reference_df.reset_index(),
                                                      features=features,
@@ -69,6 +69,28 @@ def test_h5_read_population_primary_index():
         assert x.shape[0] == 1000
 
 
+def test_h5_read_population_primary_indexes():
+    path = f"{os.getcwd()}/test_data/test.h5"
+    create_test_h5file(path=path, empty=False)
+    with h5py.File(path, "r") as f:
+        x = h5_read_population_primary_indexes(["test_pop", "missing_pop"], f)
+        assert list(x.keys()) == ["test_pop"]
+        assert x["test_pop"].shape[0] == 1000
+
+
+def test_h5_read_event_rows():
+    path = f"{os.getcwd()}/test_data/test.h5"
+    data = np.random.random(size=(1000, 4))
+    rows = np.array([0, 10, 11, 500, 999])
+    with h5py.File(path, "w") as f:
+        f.create_dataset(name="primary", data=data)
+        f.create_dataset(name="chunked", data=data, chunks=(100, 4), compression="gzip")
+    with h5py.File(path, "r") as f:
+        assert np.array_equal(h5_read_event_rows(f["primary"]), data)
+        assert np.array_equal(h5_read_event_rows(f["primary"], rows=rows), data[rows])
+        assert np.array_equal(h5_read_event_rows(f["chunked"], rows=rows), data[rows])
+
+
 def test_set_column_names():
     channels = [None, None, None, "channel1", "channel2", "channel3"]
     markers = [f"marker{i + 1}" for i in range(6)]
@@ -120,6 +142,16 @@ def test_access_data(example_populated_experiment):
             assert df.shape == (30000, 7)
 
 
+def test_access_data_sample_fraction(example_populated_experiment):
+    exp = example_populated_experiment
+    fg = exp.get_sample("test sample")
+    df = fg.data("primary", 0.1)
+    assert df.shape == (3000, 7)
+    assert df.index.is_unique
+    assert df.index.is_monotonic_increasing
+    assert np.allclose(df.values, fg.data("primary").loc[df.index].values)
+
+
 def test_add_ctrl_file_already_exists_error(example_populated_experiment):
     fg = example_populated_experiment.get_sample("test sample")
     data = pd.DataFrame([np.random.random(size=1000) for _ in range(6)]).T
@@ -146,6 +178,73 @@ def test_load_population_indexes(example_populated_experiment):
     assert fg.get_population("root").index.shape[0] == 30000
 
 
+def test_population_index_lazy_load(example_populated_experiment):
+    create_example_populations(example_populated_experiment.get_sample("test sample")).save()
+    fg = reload_filegroup(project_id="test",
+                          exp_id="test experiment",
+                          sample_id="test sample")
+    pop = fg.get_population("pop1")
+    assert not pop.index_loaded
+    assert pop.n == 15042
+    assert len(pop.index) == 15042
+    assert pop.index_loaded
+    # Remaining populations are read under the same file handle
+    assert fg.get_population("pop2").index_loaded
+    assert not fg.get_population("pop2").index_modified
+
+
+def test_population_index_modified(example_populated_experiment):
+    create_example_populations(example_populated_experiment.get_sample("test sample")).save()
+    fg = reload_filegroup(project_id="test",
+                          exp_id="test experiment",
+                          sample_id="test sample")
+    pop = fg.get_population("pop1")
+    assert len(pop.index) == 15042
+    assert not pop.index_modified
+    pop.index = pop.index[:100]
+    assert pop.index_modified
+    fg.save()
+    assert not pop.index_modified
+    fg = reload_filegroup(project_id="test",
+                          exp_id="test experiment",
+                          sample_id="test sample")
+    assert len(fg.get_population("pop1").index) == 100
+
+
+def test_write_populations_sorted(example_populated_experiment):
+    fg = example_populated_experiment.get_sample("test sample")
+    fg.add_population(Population(population_name="unsorted",
+                                 parent="root",
+                                 index=np.array([10, 3, 3, 7, 0]),
+                                 source="gate"))
+    fg.save()
+    with h5py.File(fg.h5path, "r") as f:
+        assert f["index/unsorted/primary"].attrs["sorted"]
+    fg = reload_filegroup(project_id="test",
+                          exp_id="test experiment",
+                          sample_id="test sample")
+    pop = fg.get_population("unsorted")
+    assert pop.n == 4
+    assert np.array_equal(pop.index, np.array([0, 3, 7, 10]))
+
+
+def test_write_populations_delta_encoded(example_populated_experiment):
+    fg = example_populated_experiment.get_sample("test sample")
+    idx = np.arange(0, 30000, 3)
+    fg.add_population(Population(population_name="dense",
+                                 parent="root",
+                                 index=idx,
+                                 source="gate"))
+    fg.save()
+    with h5py.File(fg.h5path, "r") as f:
+        assert f["index/dense/primary"].attrs["encoding"] == "delta"
+        assert f["index/dense/primary"].dtype == np.uint8
+    fg = reload_filegroup(project_id="test",
+                          exp_id="test experiment",
+                          sample_id="test sample")
+    assert np.array_equal(fg.get_population("dense").index, idx)
+
+
 def test_add_population(example_populated_experiment):
     create_example_populations(example_populated_experiment.get_sample("test sample")).save()
     fg = reload_filegroup(project_id="test",
@@ -245,9 +344,13 @@ def test_list_downstream_populations(example_populated_experiment, population, d
     assert fg.list_downstream_populations(population=population) == downstream_populations
 
 
-def test_print_population_tree(example_populated_experiment):
+def test_print_population_tree(example_populated_experiment, capsys):
     fg = create_example_populations(example_populated_experiment.get_sample("test sample"))
     fg.print_population_tree()
+    assert "pop3" in capsys.readouterr().out
+    fg.delete_populations(populations=["pop3"])
+    fg.print_population_tree()
+    assert "pop3" not in capsys.readouterr().out
 
 
 def test_delete_population_error_root(example_populated_experiment):
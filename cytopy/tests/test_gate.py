@@ -1,5 +1,6 @@
 from cytopy.data import gate
 from cytopy.data.geometry import *
+from cytopy.flow.transform import apply_transform
 from scipy.spatial.distance import euclidean
 from shapely.geometry import Polygon
 from sklearn.datasets import make_blobs
@@ -165,6 +166,26 @@ def test_transform_xy():
     assert transformed["Y"].std() != pytest.approx(0.5, 0.1)
 
 
+def test_transform_xy_shared():
+    transform_kwargs = {"w": 0.5, "m": 4.5, "a": 0.0, "t": 262144}
+    g = gate.Gate(gate_name="test",
+                  parent="test parent",
+                  x="X",
+                  y="Y",
+                  method="manual",
+                  transform_x="logicle",
+                  transform_y="logicle",
+                  transform_x_kwargs=transform_kwargs,
+                  transform_y_kwargs=transform_kwargs)
+    data = pd.DataFrame({"X": np.random.normal(1, scale=0.5, size=1000),
+                         "Y": np.random.normal(1, scale=0.5, size=1000)})
+    transformed = g.transform(data)
+    expected = apply_transform(data, features=["X"], method="logicle", **transform_kwargs)
+    expected = apply_transform(expected, features=["Y"], method="logicle", **transform_kwargs)
+    assert np.allclose(transformed[["X", "Y"]].values, expected[["X", "Y"]].values)
+    assert g.y_transformer is g.x_transformer
+
+
 @pytest.mark.parametrize("kwargs", [{"method": "uniform",
                                      "n": 500},
                                     {"method": "faithful"},
@@ -764,3 +785,13 @@ def create_boolean_example_data():
     b = data[(data.X > 2) & (data.Y < 4)]
     c = data[(data.X > -2) & (data.Y > 2)]
     return a, b, c
+
+
+def test_packed_membership():
+    bits, size = gate.packed_membership([np.array([0, 2, 9]), np.array([2, 3]), np.array([], dtype=int)])
+    assert size == 10
+    assert bits.shape == (3, 2)
+    union = np.flatnonzero(np.unpackbits(np.bitwise_or.reduce(bits, axis=0), count=size))
+    assert np.array_equal(union, [0, 2, 3, 9])
+    intersection = np.flatnonzero(np.unpackbits(np.bitwise_and.reduce(bits[:2], axis=0), count=size))
+    assert np.array_equal(intersection, [2])
@@ -360,3 +360,19 @@ def test_delete(example_populated_experiment, remove_associations):
     else:
         assert len(fg.gating_strategy) == 1
         assert all([p in fg.list_populations() for p in populations])
+
+
+def test_save_modified_gates_only(example_populated_experiment, monkeypatch):
+    gs = create_gatingstrategy_and_load(example_populated_experiment)
+    gs = apply_some_gates(gs)
+    assert all(g.modified for g in gs.gates)
+    gs.save()
+    assert not any(g.modified for g in gs.gates)
+    gs = reload_gatingstrategy(example_populated_experiment)
+    assert not any(g.modified for g in gs.gates)
+    saved = []
+    for g in gs.gates:
+        monkeypatch.setattr(g, "save", lambda *args, _name=g.gate_name, **kwargs: saved.append(_name))
+    gs.get_gate("test ellipse").sampling = {"method": "uniform"}
+    gs.save(save_filegroup=False)
+    assert saved == ["test ellipse"]
@@ -1,6 +1,7 @@
 from cytopy.data.geometry import PopulationGeometry, ThresholdGeom, PolygonGeom, create_polygon, \
-    polygon_overlap, create_convex_hull, probablistic_ellipse, inside_ellipse
-from shapely.geometry import Polygon
+    polygon_overlap, create_convex_hull, probablistic_ellipse, inside_ellipse, polygon_vertices, \
+    bounds_intersect, polygon_contains, within_bounds
+from shapely.geometry import Polygon, Point
 from sklearn.datasets import make_blobs
 from sklearn.mixture import GaussianMixture
 import numpy as np
@@ -41,6 +42,37 @@ def test_create_polygongeom():
         assert test[k] == v
 
 
+def test_polygongeom_shape_cached():
+    geom = PolygonGeom(x_values=[2, 6, 9, 10, 2],
+                       y_values=[5, 19, 18, 10, 5])
+    assert geom.shape is geom.shape
+    geom.x_values = [0, 6, 9, 10, 0]
+    assert geom.shape.exterior.xy[0][0] == 0
+
+
+def test_polygon_contains():
+    geom = PolygonGeom(x_values=[1., 1., 1.5, 2.5, 2.5, 1.6, 1.],
+                       y_values=[1., 2.5, 3.4, 3.4, 1., 1.4, 1.])
+    xy = np.array([[1.2, 1.5], [2.2, 3.5], [0.23, 2.0], [1.5, 1.5], [1.2, 0.5], [2., 2.]])
+    mask = polygon_contains(geom.shape, xy[:, 0], xy[:, 1])
+    assert np.array_equal(mask, np.array([True, False, False, True, False, True]))
+    assert np.array_equal(mask, [geom.shape.contains(Point(p)) for p in xy])
+
+
+def test_polygon_contains_with_hole():
+    poly = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], holes=[[(4, 4), (6, 4), (6, 6), (4, 6)]])
+    x = np.array([1., 5., 9., 11., 4.5])
+    y = np.array([1., 5., 9., 5., 5.5])
+    expected = np.array([poly.contains(Point(i, j)) for i, j in zip(x, y)])
+    assert np.array_equal(polygon_contains(poly, x, y), expected)
+
+
+def test_within_bounds():
+    x = np.array([0., 2., 5., 6., 3.])
+    y = np.array([0., 6., 5., 1., 2.])
+    assert np.array_equal(within_bounds(x, y, (0, 0, 5, 5)), [True, False, True, False, True])
+
+
 def test_create_polygon():
     x = [2, 6, 9, 10, 2]
     y = [5, 19, 18, 10, 5]
@@ -50,6 +82,14 @@ def test_create_polygon():
     assert np.array_equal(poly.exterior.xy[1], np.array(y))
 
 
+def test_polygon_vertices():
+    x = [2., 6., 9., 10., 2.]
+    y = [5., 19., 18., 10., 5.]
+    x_values, y_values = polygon_vertices(create_polygon(x, y))
+    assert x_values == x
+    assert y_values == y
+
+
 @pytest.mark.parametrize("poly1,poly2,expected",
                          [(np.array([[0, 4.], [10, 4.], [10, 8.2], [10, 8.2], [0, 8.2], [0, 4.]]),
                            np.array([[0, 4.], [5, 4.], [5, 8.2], [5, 8.2], [0, 8.2], [0, 4.]]),
@@ -63,6 +103,15 @@ def test_polygon_overlap(poly1, poly2, expected):
     assert polygon_overlap(poly1, poly2, threshold=0.6) == 0.
 
 
+@pytest.mark.parametrize("bounds1,bounds2,expected",
+                         [((0, 0, 5, 5), (4, 4, 8, 8), True),
+                          ((0, 0, 5, 5), (6, 0, 8, 5), False),
+                          ((0, 0, 5, 5), (0, 6, 5, 8), False),
+                          ((0, 0, 5, 5), (), False)])
+def test_bounds_intersect(bounds1, bounds2, expected):
+    assert bounds_intersect(bounds1, bounds2) is expected
+
+
 def test_create_convex_hull():
     test_data = make_blobs(n_samples=1000,
                            n_features=2,
@@ -109,6 +158,6 @@ def test_inside_ellipse(test_data, expected_mask):
                           width=width,
                           height=height,
                           angle=angle)
-    assert isinstance(mask, list)
+    assert isinstance(mask, np.ndarray)
     assert np.array_equal(mask, expected_mask)
 
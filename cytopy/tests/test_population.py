@@ -1,6 +1,7 @@
 from cytopy.data import population
 from cytopy.data.geometry import ThresholdGeom, PolygonGeom
 from shapely.geometry import Polygon as Poly
+import pandas as pd
 import numpy as np
 import pytest
 
@@ -91,6 +92,28 @@ def test_merge_index():
     assert np.array_equal(idx, np.array([0, 1, 2, 3, 4, 5, 8, 11, 13, 15, 19]))
 
 
+def test_merge_index_unsorted():
+    x = population.Population(population_name="test",
+                              parent="test_parent")
+    y = population.Population(population_name="test",
+                              parent="test_parent")
+    x.index = np.array([5, 1, 13, 0, 11])
+    y.index = np.array([0, 1, 3, 3, 8])
+    idx = population._merge_index(x, y)
+    assert np.array_equal(idx, np.array([0, 1, 3, 5, 8, 11, 13]))
+
+
+def test_merge_index_sparse():
+    x = population.Population(population_name="test",
+                              parent="test_parent")
+    y = population.Population(population_name="test",
+                              parent="test_parent")
+    x.index = np.array([0, 500, 1000, 25000])
+    y.index = np.array([500, 7000, 90000])
+    idx = population._merge_index(x, y)
+    assert np.array_equal(idx, np.array([0, 500, 1000, 7000, 25000, 90000]))
+
+
 def test_merge_signatures():
     x = population.Population(population_name="test")
     x.signature = dict(x=10., y=10., z=20.)
@@ -102,6 +125,19 @@ def test_merge_signatures():
     assert sig.get("z") == 12.5
 
 
+def test_create_signature():
+    data = pd.DataFrame({"x": [1., 2., 3., 10.],
+                         "y": [5., 5., 5., 5.],
+                         "label": ["a", "b", "c", "d"]})
+    sig = population.create_signature(data)
+    assert set(sig.keys()) == {"x", "y"}
+    assert sig.get("x") == 4.
+    assert sig.get("y") == 5.
+    sig = population.create_signature(data, idx=np.array([0, 1, 2]), summary_method=np.median)
+    assert sig.get("x") == 2.
+    assert sig.get("y") == 5.
+
+
 def create_threshold_pops():
     left = population.Population(population_name="left",
                                  parent="test",
@@ -128,12 +164,33 @@ def test_merge_thresholds():
     assert merged.geom.x_threshold == 0.5
     assert merged.geom.y_threshold == 1.5
     assert np.array_equal(merged.index, np.array([0, 1, 2, 3, 4, 5, 8, 11]))
+    assert merged.n == 8
     assert merged.definition == "++,+-"
     assert merged.signature.get("x") == 10
     assert merged.signature.get("y") == 10
     assert merged.parent == "test"
 
 
+def test_merge_multiple_gate_populations():
+    left, right = create_threshold_pops()
+    other = population.Population(population_name="other",
+                                  parent="test",
+                                  geom=ThresholdGeom(x_threshold=0.5,
+                                                     y_threshold=1.5),
+                                  index=np.array([11, 20]),
+                                  definition="-+",
+                                  signature=dict(x=40, y=10))
+    merged = population.merge_multiple_gate_populations([left, right, other], new_population_name="merged")
+    assert merged.population_name == "merged"
+    assert isinstance(merged.geom, ThresholdGeom)
+    assert np.array_equal(merged.index, np.array([0, 1, 2, 3, 4, 5, 8, 11, 20]))
+    assert merged.n == 9
+    assert merged.definition == "++,+-,-+"
+    assert merged.signature.get("x") == 20
+    assert merged.signature.get("y") == 10
+    assert merged.parent == "test"
+
+
 def create_poly_pops():
     poly1, poly2, _ = generate_polygons()
     left = population.Population(population_name="left",
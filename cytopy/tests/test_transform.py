@@ -1,5 +1,6 @@
 from .conftest import create_lognormal_data
 from ..flow import transform
+import numpy as np
 import pytest
 
 
@@ -20,3 +21,29 @@ def test_remove_negative_values():
     assert (valid.x > 0).all()
     assert (valid.y > 0).all()
 
+
+def test_apply_transform_map():
+    data = create_lognormal_data()
+    transformed = transform.apply_transform_map(data, feature_method={"x": "logicle", "y": "logicle"})
+    expected = transform.apply_transform(data, features=["x", "y"], method="logicle")
+    assert transformed.shape == data.shape
+    assert transformed.equals(expected)
+
+
+def test_apply_transform_single_feature():
+    data = create_lognormal_data()
+    transformed = transform.apply_transform(data, features="x", method="logicle")
+    expected = transform.apply_transform(data, features=["x"], method="logicle")
+    assert transformed.equals(expected)
+    assert transformed.y.equals(data.y)
+
+
+def test_apply_transform_dtypes():
+    data = create_lognormal_data()
+    data["x"] = data.x.astype(np.float32)
+    data["label"] = np.arange(data.shape[0], dtype=np.int32)
+    transformed = transform.apply_transform(data, features=["x", "y"], method="logicle")
+    assert transformed.x.dtype == np.float32
+    assert transformed.y.dtype == np.float64
+    assert transformed.label.dtype == np.int32
+    assert np.array_equal(transformed.label.values, data.label.values)